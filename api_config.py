@@ -1,58 +1,91 @@
-from cachetools import TTLCache
+from datetime import datetime, timezone
+import hashlib
+import hmac
 import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 import time
 import os
+import threading
 from dotenv import load_dotenv
 import logging
+from post_store import PostStore, EMPTY_STORE, merge_posts
+from post_html import known_sizes, prepare_posts, probe_image_sizes
+from refresher import Refresher
+from singleflight import SingleFlight
+import upstream
+from metrics import InstrumentedTTLCache
+from snapshot import (POSTS_CHECKED, POSTS_SNAPSHOT, RefreshLock, file_mtime, read_posts_checked,
+                      read_posts_snapshot, write_posts_checked, write_posts_snapshot)
 
 load_dotenv()
 
 # Ghost API Configuration
 GHOST_URL = os.getenv('GHOST_URL')
 GHOST_KEY = os.getenv('GHOST_CONTENT_API_KEY')
+GHOST_WEBHOOK_SECRET = os.getenv('GHOST_WEBHOOK_SECRET')
 IS_PRODUCTION = os.getenv('FLASK_ENV') == 'production'
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG if not IS_PRODUCTION else logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Single cache instance with shorter TTL
-cache = TTLCache(maxsize=100, ttl=300)  # 5 minutes for all environments
+cache = InstrumentedTTLCache('ghost', maxsize=100, ttl=int(os.getenv('GHOST_CACHE_TTL', 300)))  # 5 minutes by default
 
-# Configure retry strategy
-retry_strategy = Retry(
-    total=3,
-    backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504]
-)
+# The post collection lives outside the TTLCache so a stale copy can keep
+# serving while a single background fetch revalidates it
+POSTS_TTL = int(os.getenv('POSTS_TTL', 300))
+REFRESH_AHEAD = int(os.getenv('REFRESH_AHEAD', 60))  # Background refresher renews the posts this long before they expire
+RETRY_INTERVAL = 30  # Back off this long after a failed fetch
+FLIGHT_TIMEOUT = 30  # Longest a cold request waits on someone else's fetch
+SNAPSHOT_POLL = 5  # How often workers check for a snapshot published by the refresher
+FULL_SYNC_INTERVAL = 3600  # Refreshes in between only ask Ghost for posts edited since the last sync
+WEBHOOK_TOLERANCE = 300  # Reject webhook signatures older than this many seconds
+FORCED_REFRESH_INTERVAL = 30  # At most one forced full sync per this many seconds, across all workers
+GHOST_TIMEOUT = (3.05, 20)  # A full sync returns every post with its HTML
+PAGE_DEADLINE = 5  # Uncached pages are fetched on the request path, so give up quickly
+MISSING_PAGE_TTL = 300  # Slugs Ghost said don't exist aren't asked about again for this long
+MISSING_PAGES_MAX = 1024
+IMAGE_PROBE_RETRY = 60  # Seconds between background passes over images whose size isn't known yet
 
-session = requests.Session()
-adapter = HTTPAdapter(max_retries=retry_strategy)
-session.mount("https://", adapter)
-session.mount("http://", adapter)
+_store = None
+_store_fetched_at = 0
+_full_synced_at = 0
+_snapshot_mtime = None
+_checked_mtime = None
+_retry_after = 0
+_store_lock = threading.Lock()
+_posts_flight = SingleFlight()
+_store_listeners = []
+_page_index = None  # {slug: updated_at} of every Ghost page, synced with the posts; None until known
+_unsized_images = []  # Post images the current snapshot still lacks dimensions for
+_probe_after = 0
+_missing_pages = InstrumentedTTLCache('missing_pages', maxsize=MISSING_PAGES_MAX, ttl=MISSING_PAGE_TTL)
+# TTLCache isn't thread-safe, and gunicorn's request threads share both caches
+_cache_lock = threading.Lock()
 
 def clear_cache():
     """Clear the entire cache"""
-    cache.clear()
+    global _store_fetched_at
+    with _cache_lock:
+        cache.clear()
+        _missing_pages.clear()
+    # Keep the last good posts for stale-while-revalidate, but mark them expired
+    _store_fetched_at = 0
     logger.debug("Cache cleared")
 
-def get_all_ghost_posts(force_refresh=False):
-    """Get all posts from Ghost CMS with a single API call"""
-    cache_key = "all_posts"
-    
-    if force_refresh:
-        logger.debug("Force refresh requested, clearing cache")
-        if cache_key in cache:
-            del cache[cache_key]
-    elif cache_key in cache:
-        logger.debug("Returning cached posts")
-        return cache[cache_key]
-        
+def _prepare_post(post):
+    if post.get('feature_image'):
+        post['feature_image'] = post['feature_image'].replace('/content/images/', '/content/images/size/w1000/')
+    return post
+
+def _ghost_datetime(value):
+    """Format a Ghost ISO timestamp for an NQL filter"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def fetch_ghost_posts(updated_since=None, deadline=None):
+    """Fetch all posts (or only those edited since a watermark) from Ghost; None on failure"""
     if not GHOST_URL or not GHOST_KEY:
         logger.error("❌ Missing GHOST_URL or GHOST_KEY environment variables")
-        return []
+        return None
         
     # Use the URL structure that we know works
     api_url = f"{GHOST_URL}/ghost/api/content/posts/"
@@ -62,94 +95,405 @@ def get_all_ghost_posts(force_refresh=False):
         'formats': 'html',
         'limit': 'all'
     }
+    if updated_since:
+        # Inclusive so edits landing in the watermark's second aren't missed;
+        # _sync_posts drops the posts it already has
+        params['filter'] = f"updated_at:>='{_ghost_datetime(updated_since)}'"
     
     try:
         logger.debug(f"🔄 Fetching posts from: {api_url}")
-        response = session.get(api_url, params=params)
-        logger.debug(f"🔄 Full URL with params: {response.url}")
+        response = upstream.get(api_url, params=params, timeout=GHOST_TIMEOUT, deadline=deadline, service='ghost')
         logger.debug(f"🔄 API Response Status: {response.status_code}")
         
         if response.status_code != 200:
             logger.error(f"❌ API Error Response: {response.text}")
-            return []
+            return None
             
         response.raise_for_status()
         data = response.json()
-        posts = data.get('posts', [])
-        logger.info(f"✅ Successfully fetched {len(posts)} posts")
-        
-        for post in posts:
-            if post.get('feature_image'):
-                post['feature_image'] = post['feature_image'].replace('/content/images/', '/content/images/size/w1000/')
-        
-        cache[cache_key] = posts
+        posts = [_prepare_post(post) for post in data.get('posts', [])]
+        logger.info(f"✅ Successfully fetched {len(posts)} {'changed ' if updated_since else ''}posts")
         return posts
     except requests.exceptions.RequestException as e:
         logger.error(f"❌ Error fetching Ghost posts: {str(e)}")
         logger.error(f"❌ Full error details: {e.__class__.__name__}")
-        return cache.get(cache_key, [])
+        return None
 
-def get_ghost_posts(limit=None, tag=None, force_refresh=False):
-    """Filter posts by tag from the cached collection"""
-    all_posts = get_all_ghost_posts(force_refresh=force_refresh)
+def fetch_ghost_post(post_id):
+    """Fetch one published post by id; None if Ghost no longer serves it, raises on failure"""
+    api_url = f"{GHOST_URL}/ghost/api/content/posts/{post_id}/"
+    params = {
+        'key': GHOST_KEY,
+        'include': 'tags,authors',
+        'formats': 'html'
+    }
+    response = upstream.get(api_url, params=params, timeout=GHOST_TIMEOUT, service='ghost')
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    posts = response.json().get('posts', [])
+    return _prepare_post(posts[0]) if posts else None
+
+def fetch_ghost_page_index(deadline=None):
+    """{slug: updated_at} for every published Ghost page; None on failure"""
+    if not GHOST_URL or not GHOST_KEY:
+        return None
+    
+    api_url = f"{GHOST_URL}/ghost/api/content/pages/"
+    params = {
+        'key': GHOST_KEY,
+        'fields': 'slug,updated_at',
+        'limit': 'all'
+    }
+    try:
+        response = upstream.get(api_url, params=params, timeout=GHOST_TIMEOUT, deadline=deadline, service='ghost')
+        response.raise_for_status()
+        return {page['slug']: page.get('updated_at') for page in response.json().get('pages', [])}
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        logger.error(f"❌ Error fetching Ghost page index: {str(e)}")
+        return None
+
+def on_store_change(callback):
+    """Register callback(store) to run whenever a new post store version is swapped in"""
+    _store_listeners.append(callback)
+    return callback
+
+def _adopt_page_index(pages):
+    global _page_index
+    if pages == _page_index:
+        return
+    _page_index = pages
+    # Pages were published, edited or removed: drop cached bodies and known misses
+    with _cache_lock:
+        for key in [key for key in list(cache.keys()) if key.startswith('page_')]:
+            cache.pop(key, None)
+        _missing_pages.clear()
+
+def _adopt_snapshot(snapshot, mtime):
+    global _store, _store_fetched_at, _full_synced_at, _snapshot_mtime, _unsized_images
+    _adopt_page_index(snapshot.get('pages'))
+    _unsized_images = snapshot.get('unsized') or []
+    store = _store
+    changed = store is None or store.version != snapshot['version']
+    if changed:
+        # Build the indexes once and swap them in as a whole
+        store = PostStore(snapshot['posts'], version=snapshot['version'], previous=store)
+    with _store_lock:
+        _store = store
+        _store_fetched_at = snapshot['fetched_at']
+        _full_synced_at = snapshot.get('full_synced_at') or 0
+        _snapshot_mtime = mtime
+    if changed:
+        for callback in _store_listeners:
+            try:
+                callback(store)
+            except Exception as e:
+                logger.error(f"❌ Post store listener failed: {str(e)}")
+    return store
+
+def _publish(posts, fetched_at, full_synced_at, version=None, pages=None, previous=None):
+    # Post-process HTML once per post version; unchanged posts reuse their output
+    posts, processed, unsized = prepare_posts(posts, previous)
+    if processed:
+        # New output renders differently even if Ghost's content didn't change
+        version = None
+    snapshot = write_posts_snapshot(posts, fetched_at, full_synced_at, version=version,
+                                    pages=_page_index if pages is None else pages, unsized=unsized)
+    return _adopt_snapshot(snapshot, file_mtime(POSTS_SNAPSHOT))
+
+def _adopt_checked(force=False):
+    """Take the fetch time of a sync that found nothing new, if it was about our store"""
+    global _store_fetched_at, _checked_mtime
+    mtime = file_mtime(POSTS_CHECKED)
+    if mtime is None or (mtime == _checked_mtime and not force):
+        return
+    checked = read_posts_checked()
+    with _store_lock:
+        _checked_mtime = mtime
+        if checked is not None and _store is not None and checked.get('version') == _store.version:
+            _store_fetched_at = max(_store_fetched_at, checked['fetched_at'])
+
+def sync_from_snapshot():
+    """Load the shared snapshot if another process has published a newer one"""
+    mtime = file_mtime(POSTS_SNAPSHOT)
+    if mtime is None or mtime == _snapshot_mtime:
+        _adopt_checked()
+        return False
+    
+    snapshot = read_posts_snapshot()
+    if snapshot is None:
+        return False
+    
+    _adopt_snapshot(snapshot, mtime)
+    _adopt_checked(force=True)
+    logger.debug(f"Loaded posts snapshot {snapshot['version']}")
+    return True
+
+def _wait_for_snapshot(timeout):
+    """Cold start while another worker fetches: wait for it to publish"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if sync_from_snapshot():
+            return _store
+        time.sleep(0.1)
+    return _store
+
+def _raw_posts(store):
+    """The raw Ghost dicts behind a store; they live in the snapshot on disk, not in memory"""
+    snapshot = read_posts_snapshot()
+    if snapshot is None or snapshot['version'] != store.version:
+        return None
+    return snapshot['posts']
+
+def _sync_posts(full, deadline=None):
+    """Full or incremental sync against Ghost; returns the new store or None on failure"""
+    global _store_fetched_at
+    now = time.time()
+    store = _store
+    # The page slug list is tiny, so it is fetched whole on every sync; keep the old one on failure
+    pages = fetch_ghost_page_index(deadline=deadline)
+    raw_posts = None if full or store is None else _raw_posts(store)
+    if raw_posts is None or not store.watermark or now - _full_synced_at >= FULL_SYNC_INTERVAL:
+        # Full syncs also catch deletions and unpublishes that webhooks missed
+        posts = fetch_ghost_posts(deadline=deadline)
+        if posts is None:
+            return None
+        # Reuse processed HTML of posts this sync didn't change
+        previous = raw_posts if raw_posts is not None or store is None else _raw_posts(store)
+        return _publish(posts, now, now, pages=pages, previous=previous)
+    
+    changed = fetch_ghost_posts(updated_since=store.watermark, deadline=deadline)
+    if changed is None:
+        return None
+    # The inclusive watermark filter always returns the newest post again
+    known = {(post['id'], post.get('updated_at')) for post in raw_posts}
+    changed = [post for post in changed if (post['id'], post.get('updated_at')) not in known]
+    if not changed and (pages is None or pages == _page_index):
+        # Nothing new: leave the snapshot alone so workers don't reload it, just record the check
+        write_posts_checked(store.version, now)
+        with _store_lock:
+            _store_fetched_at = now
+        return store
+    return _publish(merge_posts(raw_posts, changed), now, _full_synced_at, pages=pages, previous=raw_posts)
+
+def _refresh_posts(force=False, deadline=None):
+    global _retry_after
+    with RefreshLock('ghost_posts') as lock:
+        if not lock.acquired:
+            # Another worker is the refresher; its snapshot will reach us
+            if _store is None:
+                return _wait_for_snapshot(FLIGHT_TIMEOUT)
+            return _store
+        
+        # The previous refresher may have published while we waited
+        sync_from_snapshot()
+        if not force and _store is not None and time.time() - _store_fetched_at < POSTS_TTL - REFRESH_AHEAD:
+            return _store
+        
+        store = _sync_posts(full=force, deadline=deadline)
+        if store is None:
+            _retry_after = time.time() + RETRY_INTERVAL
+            return _store
+        return store
+
+def seconds_until_forced_refresh():
+    """How long until another forced full sync is allowed (0 if allowed now)"""
+    sync_from_snapshot()
+    return max(0, _full_synced_at + FORCED_REFRESH_INTERVAL - time.time())
+
+def refresh_posts():
+    """Fetch all posts once, however many threads ask for it at the same time"""
+    return _posts_flight.do('all_posts', lambda: _refresh_posts(force=True)) or EMPTY_STORE
+
+def _size_images():
+    """Read the dimensions of unsized post images, then republish the posts that use them.
+
+    Runs off the refresh lock and the request path, in one worker at a time.
+    """
+    global _probe_after
+    _probe_after = time.time() + IMAGE_PROBE_RETRY
+    with RefreshLock('image_sizes') as lock:
+        if not lock.acquired:
+            return
+        sync_from_snapshot()
+        known = known_sizes()
+        urls = [url for url in _unsized_images if url not in known]
+        if urls and not probe_image_sizes(urls):
+            return
+        # Blocking: the republish only needs the lock for as long as re-processing takes
+        with RefreshLock('ghost_posts', blocking=True):
+            sync_from_snapshot()
+            raw_posts = _raw_posts(_store) if _store is not None and _unsized_images else None
+            if raw_posts is not None:
+                _publish(raw_posts, _store_fetched_at, _full_synced_at, previous=raw_posts)
+
+def _refresh_step():
+    """Pick up published snapshots, renew the posts before they expire and size new images"""
+    sync_from_snapshot()
+    now = time.time()
+    if now >= _store_fetched_at + POSTS_TTL - REFRESH_AHEAD and now >= _retry_after:
+        _posts_flight.do('all_posts', _refresh_posts)
+    if _unsized_images and now >= _probe_after:
+        _posts_flight.do_background('image_sizes', _size_images)
+    return SNAPSHOT_POLL
+
+_refresher = Refresher('ghost-posts', _refresh_step)
+
+def start_refresher():
+    """Start the background posts refresher for this process (safe to call repeatedly)"""
+    _refresher.start()
+
+def update_post(post_id, removed=False):
+    """Update or evict a single post in the shared snapshot without a full sync"""
+    try:
+        post = None if removed else fetch_ghost_post(post_id)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ Error fetching Ghost post {post_id}: {str(e)}")
+        return False
     
-    if tag:
-        filtered_posts = [
-            post for post in all_posts 
-            if any(t.get('slug') == tag for t in post.get('tags', []))
-        ]
-    else:
-        filtered_posts = all_posts
+    # Blocking: a webhook update must not be dropped because a sync is running
+    with RefreshLock('ghost_posts', blocking=True):
+        sync_from_snapshot()
+        raw_posts = _raw_posts(_store) if _store is not None else None
+        if raw_posts is None:
+            # Nothing cached yet; the next full sync will include this post
+            return True
+        posts = merge_posts(raw_posts, [post] if post else [], removed_ids=[post_id])
+        _publish(posts, _store_fetched_at, _full_synced_at)
+    logger.info(f"✅ {'Updated' if post else 'Evicted'} post {post_id} from webhook")
+    return True
+
+def verify_ghost_signature(body, header):
+    """Check a Ghost webhook's X-Ghost-Signature header ("sha256=<hex>, t=<ms>")"""
+    if not GHOST_WEBHOOK_SECRET or not header:
+        return False
+    parts = dict(part.strip().split('=', 1) for part in header.split(',') if '=' in part)
+    signature, timestamp = parts.get('sha256'), parts.get('t')
+    if not signature or not timestamp or not timestamp.isdigit():
+        return False
+    if abs(time.time() - int(timestamp) / 1000) > WEBHOOK_TOLERANCE:
+        return False
+    expected = hmac.new(GHOST_WEBHOOK_SECRET.encode(), body + timestamp.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def preload_posts(deadline=None):
+    """Load the posts into this process without starting the refresher thread.
+
+    For gunicorn's master before it forks: uses the snapshot however old
+    it is (the workers' refreshers revalidate it), and only syncs with
+    Ghost, within deadline, when there is no snapshot at all.
+    """
+    sync_from_snapshot()
+    if _store is None:
+        _refresh_posts(deadline=deadline)
+    return _store
+
+def get_post_store(force_refresh=False, timeout=FLIGHT_TIMEOUT):
+    """Get the indexed post store, serving stale data while a single fetch revalidates it.
+
+    On a cold start, waits up to timeout seconds for the one in-flight fetch.
+    Returns None while posts have never loaded (rather than an empty store),
+    so callers can tell "Ghost is unavailable" from "there are no posts".
+    """
+    if force_refresh:
+        logger.debug("Force refresh requested")
+        return refresh_posts()
+    
+    start_refresher()
+    if _store is None:
+        # Warm start from the last snapshot any process published
+        sync_from_snapshot()
+    
+    store = _store
+    if store is not None:
+        now = time.time()
+        if now - _store_fetched_at >= POSTS_TTL and now >= _retry_after:
+            logger.debug("Posts expired, revalidating in the background")
+            _posts_flight.do_background('all_posts', _refresh_posts)
+        return store
+    
+    # Cold start: nothing to serve yet, so wait on the one in-flight fetch
+    if time.time() < _retry_after:
+        return None
+    try:
+        return _posts_flight.do('all_posts', _refresh_posts, timeout=timeout)
+    except TimeoutError:
+        logger.error("❌ Timed out waiting for Ghost posts")
+        return None
+
+def _loaded_store(force_refresh=False):
+    """The post store, or EMPTY_STORE while posts have never loaded"""
+    store = get_post_store(force_refresh=force_refresh)
+    return store if store is not None else EMPTY_STORE
+
+def content_version():
+    """Version of the post content; changes whenever any post does. Never waits on Ghost"""
+    start_refresher()
+    if _store is None:
+        sync_from_snapshot()
+    store = _store
+    return store.version if store is not None else None
+
+def get_all_ghost_posts(force_refresh=False):
+    """Get summaries of all posts from Ghost CMS"""
+    return _loaded_store(force_refresh=force_refresh).posts
+
+def get_ghost_posts(limit=None, tag=None, force_refresh=False):
+    """Filter post summaries by tag from the cached collection"""
+    posts = _loaded_store(force_refresh=force_refresh).tagged(tag)
     
     if limit:
-        return filtered_posts[:limit]
-    return filtered_posts
+        return posts[:limit]
+    return posts
 
 def get_ghost_post(slug, force_refresh=False):
-    """Get a single post from the cached collection"""
-    all_posts = get_all_ghost_posts(force_refresh=force_refresh)
-    for post in all_posts:
-        if post['slug'] == slug:
-            return post
-    return None
+    """Get a single full post, HTML included, from the cached collection"""
+    return _loaded_store(force_refresh=force_refresh).full(slug)
+
+def get_posts_page(tag=None, cursor=None, limit=10):
+    """(summaries, next cursor key) for one page of posts, newest first"""
+    return _loaded_store().page(tag=tag, cursor=cursor, limit=limit)
+
+def search_posts(query, tag=None, limit=10):
+    """[(summary, score)] for a full-text query over the cached posts"""
+    return _loaded_store().search(query, tag=tag, limit=limit)
 
 def get_case_studies(limit=None):
-    """Get case studies from Ghost"""
-    posts = get_ghost_posts(limit=limit, tag='case-studies')
-    
-    # Truncate excerpts to 120 characters and handle None values
-    for post in posts:
-        excerpt = post.get('excerpt') or ''  # Use empty string if excerpt is None
-        if len(excerpt) > 120:
-            post['excerpt'] = excerpt[:120].rstrip() + '...'
-        else:
-            post['excerpt'] = excerpt
+    """Get case studies from Ghost, with excerpts truncated to 120 characters"""
+    posts = _loaded_store().case_studies
     
+    if limit:
+        return posts[:limit]
     return posts
 
 def get_next_post(current_post, tag=None):
     """Get next post in chronological order"""
-    posts = get_ghost_posts(tag=tag)
-    try:
-        current_index = next(i for i, post in enumerate(posts) if post['slug'] == current_post['slug'])
-        return posts[current_index + 1] if current_index + 1 < len(posts) else None
-    except (StopIteration, IndexError):
-        return None
+    return _loaded_store().next(current_post['slug'], tag=tag)
 
 def get_prev_post(current_post, tag=None):
     """Get previous post in chronological order"""
-    posts = get_ghost_posts(tag=tag)
-    try:
-        current_index = next(i for i, post in enumerate(posts) if post['slug'] == current_post['slug'])
-        return posts[current_index - 1] if current_index > 0 else None
-    except (StopIteration, IndexError):
-        return None
+    return _loaded_store().prev(current_post['slug'], tag=tag)
+
+def get_page_index():
+    """{slug: updated_at} of every published Ghost page as of the last sync; empty until known"""
+    if _page_index is None:
+        sync_from_snapshot()
+    return dict(_page_index or {})
 
 def get_ghost_page(slug):
-    """Get a single page from Ghost with caching"""
+    """Get a single page from Ghost with caching; slugs Ghost doesn't have never reach it"""
+    if _page_index is None:
+        sync_from_snapshot()
+    if _page_index is not None and slug not in _page_index:
+        return None
     cache_key = f"page_{slug}"
-    if cache_key in cache:
-        return cache[cache_key]
+    with _cache_lock:
+        missing = _missing_pages.get(slug)
+        page = None if missing else cache.get(cache_key)
+    if missing:
+        return None
+    if page is not None:
+        return page
         
     if not GHOST_URL or not GHOST_KEY:
         return None
@@ -162,13 +506,21 @@ def get_ghost_page(slug):
     }
     
     try:
-        response = requests.get(api_url, params=params)
+        response = upstream.get(api_url, params=params, deadline=upstream.deadline_in(PAGE_DEADLINE), service='ghost')
+        if response.status_code == 404:
+            with _cache_lock:
+                _missing_pages[slug] = True
+            return None
         response.raise_for_status()
         pages = response.json().get('pages', [])
         page = pages[0] if pages else None
-        if page:
-            cache[cache_key] = page
+        with _cache_lock:
+            if page:
+                cache[cache_key] = page
+            else:
+                _missing_pages[slug] = True
         return page
     except Exception as e:
-        print(f"❌ Ghost API error fetching page: {str(e)}")
-        return None 
\ No newline at end of file
+        # Transient failures aren't cached, so the next request retries
+        logger.error(f"❌ Ghost API error fetching page: {str(e)}")
+        return None
@@ -0,0 +1,47 @@
+"""Content-hashed static asset names.
+
+utils/fingerprint.py copies static/css, static/js and static/images to
+static/dist/ under names containing a hash of their content and records
+them in static/dist/manifest.json. url_for('static', ...) emits those
+names, so hashed assets can be cached forever and a deploy changes every
+URL whose content changed.
+"""
+import json
+import os
+
+FINGERPRINT_DIRS = ('css', 'js', 'images')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 10
+
+IMMUTABLE_MAX_AGE = 31536000  # One year; hashed URLs never change content
+STATIC_MAX_AGE = 3600  # Un-hashed files (dev, or not in the manifest) revalidate hourly
+
+
+def manifest_path(static_folder):
+    return os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+
+
+def load_manifest(static_folder):
+    """{'css/styles.css': 'dist/css/styles.<hash>.css', ...}; empty if the build step hasn't run"""
+    try:
+        with open(manifest_path(static_folder)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_fingerprinted(filename):
+    return filename.startswith(DIST_DIR + '/')
+
+
+def init_app(app):
+    """Rewrite url_for('static', filename=...) to hashed names and cache them immutably"""
+    manifest = load_manifest(app.static_folder)
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+
+    return manifest
@@ -0,0 +1,311 @@
+"""Local stand-ins for the site's upstream APIs: Ghost Content API, GitHub GraphQL and ElevenLabs.
+
+    python bench/fake_upstreams.py [--port 8765] [--latency 0.05] [--error-rate 0] [--posts 50]
+
+Then run the site with GHOST_URL, GITHUB_GRAPHQL_URL and
+ELEVEN_LABS_API_URL pointing at http://127.0.0.1:<port> (bench/run.py
+does this for you). Content is generated deterministically from the
+archive size, so runs are comparable. Latency and error rate can be
+changed while running by POSTing JSON to /config, and /stats counts the
+requests each API has received.
+
+Post bodies reference images on the fake itself, served as PNGs of a
+size derived from the file name, so sync-time image probing has
+something to read.
+
+The fake ElevenLabs streaming endpoint sends fake MP3 bytes in chunks
+with a delay between them, like real synthesis.
+"""
+import argparse
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TTS_CHUNKS = int(os.getenv('FAKE_TTS_CHUNKS', 8))
+TTS_CHUNK_SIZE = int(os.getenv('FAKE_TTS_CHUNK_SIZE', 4096))
+TTS_CHUNK_DELAY = float(os.getenv('FAKE_TTS_CHUNK_DELAY', 0.05))
+
+TAGS = ['news', 'playbook', 'tech-stack', 'case-studies']
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+HOST_PLACEHOLDER = '__FAKE_HOST__'  # Replaced with this server's address in responses
+
+# Mutable at runtime through POST /config
+config = {
+    'latency': float(os.getenv('FAKE_LATENCY', 0.05)),  # Seconds added to every response
+    'jitter': float(os.getenv('FAKE_JITTER', 0.0)),  # Up to this many extra seconds, uniformly
+    'error_rate': float(os.getenv('FAKE_ERROR_RATE', 0.0)),  # Share of requests answered with a 503
+    'posts': int(os.getenv('FAKE_POSTS', 50)),
+    'pages': int(os.getenv('FAKE_PAGES', 5)),
+    'paragraphs': int(os.getenv('FAKE_PARAGRAPHS', 12)),  # Body length of each post
+}
+
+_stats = {}
+_stats_lock = threading.Lock()
+_archive = None
+_archive_key = None
+_archive_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] = _stats.get(name, 0) + 1
+
+
+def _timestamp(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def make_post(i, paragraphs):
+    """Post i of the archive; the same i and size always give the same post"""
+    rng = random.Random(i)
+    tag = TAGS[i % len(TAGS)]
+    published = EPOCH + timedelta(days=i)
+    words = ['design', 'research', 'systems', 'prototype', 'users', 'interface', 'workshop', 'journey']
+    body = ''.join(
+        f'<h2>Section {n}</h2><p>{" ".join(rng.choice(words) for _ in range(60))}</p>'
+        f'<img src="{HOST_PLACEHOLDER}/content/images/2024/post-{i}-{n}.jpg" alt="">'
+        for n in range(paragraphs)
+    )
+    return {
+        'id': f'{i:024x}',
+        'slug': f'post-{i}',
+        'title': f'Post {i}: {rng.choice(words).title()} notes',
+        'html': body,
+        'excerpt': ' '.join(rng.choice(words) for _ in range(40)),
+        'feature_image': f'https://example.ghost.io/content/images/2024/feature-{i}.jpg',
+        'reading_time': paragraphs // 3 + 1,
+        'published_at': _timestamp(published),
+        'updated_at': _timestamp(published + timedelta(hours=1)),
+        'tags': [{'slug': tag, 'name': tag.replace('-', ' ').title()}],
+        'authors': [{'name': 'Bryce'}],
+    }
+
+
+def make_page(i):
+    return {
+        'slug': f'page-{i}',
+        'title': f'Page {i}',
+        'html': f'<p>Static page {i}</p>' * 20,
+        'excerpt': f'Static page {i}',
+        'published_at': _timestamp(EPOCH),
+        'updated_at': _timestamp(EPOCH),
+        'feature_image': None,
+    }
+
+
+def archive():
+    """(posts, pages) for the configured archive size, built once per size"""
+    global _archive, _archive_key
+    key = (config['posts'], config['pages'], config['paragraphs'])
+    with _archive_lock:
+        if key != _archive_key:
+            posts = [make_post(i, config['paragraphs']) for i in range(config['posts'])]
+            posts.reverse()  # Newest first, like Ghost
+            _archive = (posts, [make_page(i) for i in range(config['pages'])])
+            _archive_key = key
+        return _archive
+
+
+def image_size(name):
+    """Deterministic (width, height) for an image file name"""
+    seed = zlib.crc32(name.encode('utf-8'))
+    return 800 + seed % 1200, 600 + (seed >> 12) % 600
+
+
+def make_png(width, height):
+    """A valid, blank RGB PNG"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = zlib.compress((b'\x00' + b'\xff' * (width * 3)) * height, 9)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', rows) + chunk(b'IEND', b''))
+
+
+def _updated_since(ghost_filter):
+    """Watermark of an "updated_at:>='YYYY-MM-DD HH:MM:SS'" filter, or None"""
+    if not ghost_filter.startswith('updated_at:>'):
+        return None
+    value = ghost_filter.split("'")[1]
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+
+def _fields(items, fields):
+    if not fields:
+        return items
+    names = fields.split(',')
+    return [{name: item.get(name) for name in names} for item in items]
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        host = f"http://{self.headers.get('Host', '127.0.0.1')}"
+        body = json.dumps(payload).replace(HOST_PLACEHOLDER, host).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay_or_fail(self, name):
+        """Count the call, wait the configured latency, and answer 503 for the configured share"""
+        _count(name)
+        time.sleep(config['latency'] + random.uniform(0, config['jitter']))
+        if random.random() < config['error_rate']:
+            _count(f'{name}_errors')
+            self._send_json({'errors': [{'message': 'Injected failure'}]}, 503)
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+        if path == '/stats':
+            with _stats_lock:
+                return self._send_json(dict(_stats))
+        if path == '/config':
+            return self._send_json(config)
+        if '/ghost/api/' in path:
+            return self._ghost(path, query)
+        if path.startswith('/content/images/'):
+            return self._image(path)
+        self._send_json({'error': 'not found'}, 404)
+
+    def _ghost(self, path, query):
+        posts, pages = archive()
+        parts = path.split('/')
+        if parts[-1] == 'posts':
+            if self._delay_or_fail('ghost_posts'):
+                return
+            since = _updated_since(query.get('filter', ''))
+            if since is not None:
+                posts = [post for post in posts if datetime.strptime(
+                    post['updated_at'], '%Y-%m-%dT%H:%M:%S.000Z').replace(tzinfo=timezone.utc) >= since]
+            return self._send_json({'posts': _fields(posts, query.get('fields'))})
+        if parts[-2] == 'posts':
+            if self._delay_or_fail('ghost_post'):
+                return
+            matches = [post for post in posts if post['id'] == parts[-1]]
+            return self._send_json({'posts': matches} if matches else {'errors': []}, 200 if matches else 404)
+        if parts[-1] == 'pages':
+            if self._delay_or_fail('ghost_pages'):
+                return
+            return self._send_json({'pages': _fields(pages, query.get('fields'))})
+        if parts[-2] == 'slug' and parts[-3] == 'pages':
+            if self._delay_or_fail('ghost_page'):
+                return
+            matches = [page for page in pages if page['slug'] == parts[-1]]
+            return self._send_json({'pages': matches} if matches else {'errors': []}, 200 if matches else 404)
+        self._send_json({'errors': [{'message': 'Unknown resource'}]}, 404)
+
+    def _image(self, path):
+        if self._delay_or_fail('images'):
+            return
+        body = make_png(*image_size(os.path.basename(path)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Size probes hang up once they have read the image header
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        path = urlparse(self.path).path
+        if path == '/config':
+            config.update({name: type(config[name])(value) for name, value in payload.items() if name in config})
+            return self._send_json(config)
+        if path == '/graphql':
+            return self._contributions()
+        if path.startswith('/v1/text-to-speech/'):
+            return self._text_to_speech(payload, stream=path.endswith('/stream'))
+        self._send_json({'error': 'not found'}, 404)
+
+    def _contributions(self):
+        if self._delay_or_fail('github'):
+            return
+        rng = random.Random(0)
+        start = datetime.now(timezone.utc) - timedelta(weeks=52)
+        weeks = [{'contributionDays': [{
+            'contributionCount': rng.randint(0, 9),
+            'date': (start + timedelta(days=week * 7 + day)).strftime('%Y-%m-%d'),
+            'weekday': day
+        } for day in range(7)]} for week in range(53)]
+        total = sum(day['contributionCount'] for week in weeks for day in week['contributionDays'])
+        self._send_json({'data': {'user': {'contributionsCollection': {
+            'contributionCalendar': {'totalContributions': total, 'weeks': weeks}}}}})
+
+    def _text_to_speech(self, payload, stream):
+        if self._delay_or_fail('tts'):
+            return
+        if not payload.get('text'):
+            return self._send_json({'detail': 'text is required'}, 422)
+        # Deterministic per text, so cached and streamed audio can be compared
+        seed = payload['text'].encode('utf-8')
+        chunks = [b'ID3' + (seed * TTS_CHUNK_SIZE)[:TTS_CHUNK_SIZE - 3]]
+        chunks += [(seed * TTS_CHUNK_SIZE)[:TTS_CHUNK_SIZE] for _ in range(TTS_CHUNKS - 1)]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        if not stream:
+            time.sleep(TTS_CHUNK_DELAY * TTS_CHUNKS)
+            body = b''.join(chunks)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                time.sleep(TTS_CHUNK_DELAY)
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # The site stopped listening, e.g. its client hung up mid-stream
+            self.close_connection = True
+
+
+def serve(port=8765):
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeUpstreamHandler)
+    server.daemon_threads = True
+    print(f"Fake upstreams on http://127.0.0.1:{port}", flush=True)
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('port', nargs='?', type=int)
+    parser.add_argument('--port', dest='port_option', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=config['latency'])
+    parser.add_argument('--jitter', type=float, default=config['jitter'])
+    parser.add_argument('--error-rate', type=float, default=config['error_rate'])
+    parser.add_argument('--posts', type=int, default=config['posts'])
+    parser.add_argument('--pages', type=int, default=config['pages'])
+    parser.add_argument('--paragraphs', type=int, default=config['paragraphs'])
+    args = parser.parse_args(argv)
+    config.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                  posts=args.posts, pages=args.pages, paragraphs=args.paragraphs)
+    serve(args.port or args.port_option)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,7 @@
+"""gunicorn settings for bench/run.py's cold scenario.
+
+Deliberately not the production gunicorn.conf.py: without its
+on_starting warm-up, the first requests to a fresh server pay for the
+initial Ghost and GitHub fetches, which is what the cold scenario times.
+"""
+preload_app = False
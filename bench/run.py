@@ -0,0 +1,398 @@
+"""Load and latency benchmark: the site under gunicorn against local upstream fakes.
+
+    python bench/run.py [--scenarios cold,warm,expiry] [--concurrency 1,8,32] [--duration 10]
+                        [--workers 2] [--threads 8] [--latency 0.05] [--posts 50]
+                        [--output bench/results/<commit>.json] [--baseline OLD.json]
+
+Starts bench/fake_upstreams.py and gunicorn (server:app) on free local
+ports with an empty CACHE_DIR, then measures throughput and p50/p95/p99
+latency per route and concurrency level:
+
+cold    a fresh server and cache directory for every route and level,
+        started without gunicorn.conf.py's warm-up (bench/gunicorn_cold.conf.py);
+        only the first --cold-requests requests are timed
+warm    one server with the production gunicorn.conf.py, every route
+        primed first, then timed for --duration
+expiry  post, page and GitHub TTLs cut to --ttl seconds and every route
+        requested at once for --duration, so entries expire under load;
+        upstream call counts show whether expiries stampede
+
+Results are written as JSON along with the commit and settings, and
+--baseline prints the change against an earlier result file.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'bench', 'results')
+PRODUCTION_CONFIG = os.path.join(ROOT, 'gunicorn.conf.py')
+COLD_CONFIG = os.path.join(ROOT, 'bench', 'gunicorn_cold.conf.py')
+READY_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+CHAT_MESSAGES = ['What do you do?', 'Which tools do you use?', 'How do workshops run?', 'Tell me about design systems.']
+
+
+def routes(posts, pages):
+    """{name: callable(i) -> (method, path, body)}; i cycles through slugs so many cache entries are touched"""
+    post_count = max(posts, 1)
+    page_count = max(pages, 1)
+    return {
+        '/': lambda i: ('GET', '/', None),
+        '/blog/<slug>': lambda i: ('GET', f'/blog/post-{i % post_count}', None),
+        '/api/posts/<slug>': lambda i: ('GET', f'/api/posts/post-{i % post_count}', None),
+        '/<path>': lambda i: ('GET', f'/page-{i % page_count}', None),
+        '/api/chat': lambda i: ('POST', '/api/chat',
+                                json.dumps({'message': CHAT_MESSAGES[i % len(CHAT_MESSAGES)]})),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                             cwd=ROOT, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, dirty
+
+
+def wait_until_listening(port, process, timeout=READY_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with {process.returncode} before listening on {port}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on {port} after {timeout}s")
+
+
+def call_json(port, method, path, payload=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=REQUEST_TIMEOUT)
+    try:
+        body = json.dumps(payload) if payload is not None else None
+        connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        return json.loads(connection.getresponse().read() or b'{}')
+    finally:
+        connection.close()
+
+
+class Fakes:
+    """bench/fake_upstreams.py in a subprocess"""
+
+    def __init__(self, args):
+        self.port = free_port()
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, 'bench', 'fake_upstreams.py'), '--port', str(self.port),
+             '--latency', str(args.latency), '--jitter', str(args.jitter), '--error-rate', str(args.error_rate),
+             '--posts', str(args.posts), '--pages', str(args.pages)],
+            stdout=subprocess.DEVNULL
+        )
+        wait_until_listening(self.port, self.process)
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def stats(self):
+        return call_json(self.port, 'GET', '/stats')
+
+    def configure(self, **settings):
+        return call_json(self.port, 'POST', '/config', settings)
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class Site:
+    """gunicorn serving server:app with its own empty cache directory.
+
+    config is passed explicitly; otherwise gunicorn would pick up
+    gunicorn.conf.py from the working directory whatever the scenario.
+    """
+
+    def __init__(self, args, fakes, env=None, config=PRODUCTION_CONFIG):
+        self.port = free_port()
+        self.cache_dir = tempfile.mkdtemp(prefix='bench-cache-')
+        environment = dict(
+            os.environ,
+            GHOST_URL=fakes.url,
+            GHOST_CONTENT_API_KEY='bench',
+            GITHUB_TOKEN='bench',
+            GITHUB_GRAPHQL_URL=f'{fakes.url}/graphql',
+            ELEVEN_LABS_API_URL=fakes.url,
+            ELEVEN_LABS_VOICE_ID='bench',
+            ELEVEN_LABS_API_KEY='bench',
+            CACHE_DIR=self.cache_dir,
+            LOG_LEVEL='WARNING',
+            **(env or {})
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', config, '--bind', f'127.0.0.1:{self.port}',
+             '--workers', str(args.workers), '--threads', str(args.threads),
+             '--log-level', 'warning', 'server:app'],
+            cwd=ROOT, env=environment, stderr=None if args.verbose else subprocess.DEVNULL
+        )
+        wait_until_listening(self.port, self.process)
+
+    def stop(self):
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_load(port, targets, concurrency, duration=None, requests=None):
+    """Drive targets (a list of callable(i)) from concurrency keep-alive clients.
+
+    Stops after duration seconds, or once requests requests have been sent.
+    Returns ({target index: [(seconds, status)]}, elapsed wall time).
+    """
+    counter = itertools.count()
+    samples = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration if duration else None
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=REQUEST_TIMEOUT)
+        local = []
+        while True:
+            i = next(counter)
+            if (requests is not None and i >= requests) or (deadline is not None and time.monotonic() >= deadline):
+                break
+            target = i % len(targets)
+            method, path, body = targets[target](i // len(targets))
+            headers = {'Accept-Encoding': 'br, gzip', 'Accept': 'text/html,application/json'}
+            if body is not None:
+                headers['Content-Type'] = 'application/json'
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                status = 0
+                connection.close()
+            local.append((target, time.perf_counter() - start, status))
+        connection.close()
+        with lock:
+            for target, seconds, status in local:
+                samples.setdefault(target, []).append((seconds, status))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(seconds for seconds, _ in samples)
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(count for status, count in statuses.items() if status == '0' or int(status) >= 500)
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'statuses': statuses,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+        'mean_ms': ms(sum(latencies) / len(latencies) if latencies else None),
+    }
+
+
+def upstream_delta(before, after):
+    return {name: after.get(name, 0) - before.get(name, 0)
+            for name in sorted(set(before) | set(after)) if after.get(name, 0) != before.get(name, 0)}
+
+
+def result(scenario, route, concurrency, summary, upstream):
+    row = {'scenario': scenario, 'route': route, 'concurrency': concurrency}
+    row.update(summary)
+    row['upstream_calls'] = upstream
+    print(f"{scenario:7} {route:18} c={concurrency:<3} {row['throughput_rps'] or 0:8.1f} rps  "
+          f"p50 {row['p50_ms']}ms  p95 {row['p95_ms']}ms  p99 {row['p99_ms']}ms  errors {row['errors']}",
+          flush=True)
+    return row
+
+
+def cold(args, fakes, targets):
+    rows = []
+    for route, target in targets.items():
+        for concurrency in args.concurrency:
+            before = fakes.stats()
+            site = Site(args, fakes, config=COLD_CONFIG)
+            try:
+                samples, elapsed = run_load(site.port, [target], concurrency, requests=args.cold_requests)
+            finally:
+                site.stop()
+            rows.append(result('cold', route, concurrency, summarize(samples.get(0, []), elapsed),
+                               upstream_delta(before, fakes.stats())))
+    return rows
+
+
+def warm(args, fakes, targets):
+    rows = []
+    site = Site(args, fakes)
+    try:
+        # Prime every slug the timed run will touch
+        run_load(site.port, list(targets.values()), 4, requests=len(targets) * max(args.posts, args.pages))
+        for route, target in targets.items():
+            for concurrency in args.concurrency:
+                before = fakes.stats()
+                samples, elapsed = run_load(site.port, [target], concurrency, duration=args.duration)
+                rows.append(result('warm', route, concurrency, summarize(samples.get(0, []), elapsed),
+                                   upstream_delta(before, fakes.stats())))
+    finally:
+        site.stop()
+    return rows
+
+
+def expiry(args, fakes, targets):
+    rows = []
+    ttl = str(args.ttl)
+    site = Site(args, fakes, env={'POSTS_TTL': ttl, 'REFRESH_AHEAD': '0', 'GHOST_CACHE_TTL': ttl,
+                                  'GITHUB_REFRESH_INTERVAL': ttl})
+    names = list(targets)
+    try:
+        run_load(site.port, list(targets.values()), 4, requests=len(targets) * max(args.posts, args.pages))
+        for concurrency in args.concurrency:
+            before = fakes.stats()
+            samples, elapsed = run_load(site.port, list(targets.values()), concurrency, duration=args.duration)
+            upstream = upstream_delta(before, fakes.stats())
+            for index, route in enumerate(names):
+                rows.append(result('expiry', route, concurrency, summarize(samples.get(index, []), elapsed), upstream))
+    finally:
+        site.stop()
+    return rows
+
+
+SCENARIOS = {'cold': cold, 'warm': warm, 'expiry': expiry}
+
+
+def compare(rows, baseline_path):
+    """Print p50/p99/throughput changes against an earlier result file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(row['scenario'], row['route'], row['concurrency']): row for row in baseline['results']}
+    print(f"\nAgainst {baseline['meta']['commit']} ({baseline_path}):")
+    for row in rows:
+        old = previous.get((row['scenario'], row['route'], row['concurrency']))
+        if old is None:
+            continue
+        changes = []
+        for name in ('throughput_rps', 'p50_ms', 'p99_ms'):
+            if old.get(name) and row.get(name) is not None:
+                changes.append(f"{name} {old[name]} -> {row[name]} ({(row[name] - old[name]) / old[name]:+.0%})")
+        print(f"{row['scenario']:7} {row['route']:18} c={row['concurrency']:<3} " + '  '.join(changes))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    split = lambda value: [item for item in value.split(',') if item]
+    parser.add_argument('--scenarios', type=split, default=list(SCENARIOS))
+    parser.add_argument('--routes', type=split, help="Subset of routes, e.g. '/,/api/chat'")
+    parser.add_argument('--concurrency', type=lambda value: [int(item) for item in split(value)], default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per warm and expiry run")
+    parser.add_argument('--cold-requests', type=int, default=50, help="Requests timed per cold run")
+    parser.add_argument('--ttl', type=int, default=3, help="Cache TTLs in the expiry scenario")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds each upstream call takes")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of upstream calls that fail")
+    parser.add_argument('--posts', type=int, default=50, help="Archive size")
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--output', help="Result file (default bench/results/<commit>.json)")
+    parser.add_argument('--baseline', help="Earlier result file to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Show gunicorn's output")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    commit, dirty = git_commit()
+    targets = routes(args.posts, args.pages)
+    if args.routes:
+        targets = {name: targets[name] for name in args.routes}
+
+    fakes = Fakes(args)
+    rows = []
+    try:
+        for scenario in args.scenarios:
+            rows += SCENARIOS[scenario](args, fakes, targets)
+    finally:
+        fakes.stop()
+
+    settings = {name: value for name, value in vars(args).items() if name not in ('output', 'baseline', 'verbose')}
+    report = {
+        'meta': {
+            'commit': commit + ('-dirty' if dirty else ''),
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'settings': settings,
+        },
+        'results': rows,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.baseline:
+        compare(rows, args.baseline)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
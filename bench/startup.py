@@ -0,0 +1,154 @@
+"""Startup-time benchmark: import cost and boot-to-first-response under gunicorn.
+
+    python bench/startup.py [--runs 5] [--max-import-ms N] [--max-ready-s N]
+                            [--output bench/results/startup-<commit>.json] [--baseline OLD.json]
+
+Import: `python -X importtime -c "import server"` in fresh interpreters,
+reporting the median total and the slowest modules by self time.
+Boot: gunicorn (with gunicorn.conf.py, so preload and warm-up included)
+against the upstream fakes and an empty CACHE_DIR, timing how long until
+it listens and how long the first requests then take. The budgets turn
+a regression into a non-zero exit, for CI.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from run import RESULTS_DIR, ROOT, Fakes, Site, git_commit
+
+FIRST_REQUESTS = ('/', '/blog', '/blog/post-1', '/api/posts/post-1', '/api/search?q=design')
+TOP_MODULES = 15
+
+
+def import_profile():
+    """(total seconds, {module: self seconds}) for one fresh `import server`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import server'],
+                            cwd=ROOT, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, LOG_LEVEL='WARNING'))
+    modules = {}
+    total = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us) / 1e6
+        if name.strip() == 'server':
+            total = int(cumulative_us) / 1e6
+    return total, modules
+
+
+def measure_imports(runs):
+    totals = []
+    self_times = {}
+    for _ in range(runs):
+        total, modules = import_profile()
+        totals.append(total)
+        for name, seconds in modules.items():
+            self_times.setdefault(name, []).append(seconds)
+    slowest = sorted(((statistics.median(times), name) for name, times in self_times.items()), reverse=True)
+    return {
+        'import_ms': round(statistics.median(totals) * 1000, 1),
+        'import_runs_ms': [round(total * 1000, 1) for total in totals],
+        'slowest_modules_ms': {name: round(seconds * 1000, 2) for seconds, name in slowest[:TOP_MODULES]},
+    }
+
+
+def first_response_ms(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        start = time.perf_counter()
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return round((time.perf_counter() - start) * 1000, 2), response.status
+    finally:
+        connection.close()
+
+
+def measure_boot(args, fakes):
+    boots = []
+    for _ in range(args.runs):
+        before = fakes.stats()
+        started = time.monotonic()
+        site = Site(args, fakes)
+        ready = time.monotonic() - started
+        try:
+            first = {path: first_response_ms(site.port, path) for path in FIRST_REQUESTS}
+        finally:
+            site.stop()
+        after = fakes.stats()
+        boots.append({
+            'ready_s': round(ready, 3),
+            'first_requests_ms': {path: ms for path, (ms, _) in first.items()},
+            'statuses': {path: status for path, (_, status) in first.items()},
+            'upstream_calls': {name: after[name] - before.get(name, 0)
+                               for name in after if after[name] != before.get(name, 0)},
+        })
+    return {
+        'ready_s': round(statistics.median(boot['ready_s'] for boot in boots), 3),
+        'first_request_ms': round(statistics.median(boot['first_requests_ms']['/'] for boot in boots), 2),
+        'boots': boots,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds each upstream call takes")
+    parser.add_argument('--posts', type=int, default=50, help="Archive size")
+    parser.add_argument('--max-import-ms', type=float, help="Fail if the median import takes longer")
+    parser.add_argument('--max-ready-s', type=float, help="Fail if gunicorn takes longer to listen")
+    parser.add_argument('--output')
+    parser.add_argument('--baseline', help="Earlier startup result to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Show gunicorn's output")
+    args = parser.parse_args(argv)
+    args.jitter, args.error_rate, args.pages = 0.0, 0.0, 5
+
+    commit, dirty = git_commit()
+    report = {'meta': {'commit': commit + ('-dirty' if dirty else ''), 'runs': args.runs,
+                       'workers': args.workers, 'latency': args.latency, 'posts': args.posts}}
+    report.update(measure_imports(args.runs))
+    fakes = Fakes(args)
+    try:
+        report.update(measure_boot(args, fakes))
+    finally:
+        fakes.stop()
+
+    print(f"import server: {report['import_ms']}ms median of {args.runs}")
+    for name, ms in report['slowest_modules_ms'].items():
+        print(f"  {ms:8.2f}ms  {name}")
+    print(f"gunicorn listening after {report['ready_s']}s, first / in {report['first_request_ms']}ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name in ('import_ms', 'ready_s', 'first_request_ms'):
+            old, new = baseline.get(name), report[name]
+            if old:
+                print(f"{name}: {old} -> {new} ({(new - old) / old:+.0%}) against {baseline['meta']['commit']}")
+
+    failures = []
+    if args.max_import_ms is not None and report['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {report['import_ms']}ms (budget {args.max_import_ms}ms)")
+    if args.max_ready_s is not None and report['ready_s'] > args.max_ready_s:
+        failures.append(f"gunicorn took {report['ready_s']}s to listen (budget {args.max_ready_s}s)")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
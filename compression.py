@@ -0,0 +1,124 @@
+"""Compress once, serve many times.
+
+Cached pages and API bodies are compressed when they are created and
+static files at build time (utils/precompress.py); the request path only
+picks the variant the client accepts. The few bodies built per request
+(search results, /metrics) go through compress_response() at a cheaper
+Brotli quality.
+"""
+import gzip
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # gzip-only without the Brotli wheel
+    brotli = None
+
+MIN_SIZE = 500  # Not worth compressing below this
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11  # Build time: slowest, smallest
+RUNTIME_BROTLI_QUALITY = 9  # Cached bodies compress on a cache miss, so trade a little size for speed
+REQUEST_BROTLI_QUALITY = 5  # Uncached bodies compress on every request
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+# Preferred order when the client accepts several
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body, encoding, brotli_quality=BROTLI_QUALITY):
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_variants(body, brotli_quality=RUNTIME_BROTLI_QUALITY):
+    """{encoding: bytes} for every encoding that actually makes the body smaller"""
+    variants = {}
+    if len(body) < MIN_SIZE:
+        return variants
+    for encoding in ENCODINGS:
+        compressed = compress(body, encoding, brotli_quality)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings the client accepts (q > 0) from an Accept-Encoding header"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+def negotiate(available, accept_encoding=None):
+    """Pick the best encoding present in available, or None for identity"""
+    if accept_encoding is None:
+        accept_encoding = request.headers.get('Accept-Encoding', '')
+    accepted = accepted_encodings(accept_encoding)
+    for encoding in ENCODINGS:
+        if encoding in available and (encoding in accepted or '*' in accepted):
+            return encoding
+    return None
+
+
+def compress_response(response, brotli_quality=REQUEST_BROTLI_QUALITY):
+    """Compress an uncached response body in the best encoding the client accepts"""
+    if response.direct_passthrough or not is_compressible(response.mimetype):
+        return response
+    body = response.get_data()
+    if len(body) < MIN_SIZE:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(ENCODINGS)
+    if encoding is None:
+        return response
+    compressed = compress(body, encoding, brotli_quality)
+    if len(compressed) < len(body):
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def send_static_precompressed(filename):
+    """Static view that serves a build-time .br/.gz sibling when the client accepts it.
+
+    Replaces Flask's static view; files still go out via send_file, so
+    gunicorn can use sendfile() for them.
+    """
+    static_folder = current_app.static_folder
+    path = safe_join(static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    available = [e for e in ENCODINGS if os.path.isfile(path + EXTENSIONS[e])] if is_compressible(mimetype) else []
+    encoding = negotiate(available)
+    if encoding is None:
+        response = send_from_directory(static_folder, filename, mimetype=mimetype)
+    else:
+        response = send_from_directory(static_folder, filename + EXTENSIONS[encoding], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    if available:
+        response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,185 @@
+"""Byte-capped LRU of files on disk, shared by all workers.
+
+Sizes and access times live in a small SQLite index next to the files,
+which makes the byte cap and LRU eviction cheap: no directory scans on
+the request path. Used for synthesized speech (tts_cache.py) and resized
+images (image_resize.py).
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TOUCH_FLUSH_INTERVAL = 30  # Seconds between batched LRU updates from lookup()
+
+
+class DiskCache:
+    """Files named by key under directory, evicted least recently used past max_bytes"""
+
+    def __init__(self, directory, max_bytes, extension=''):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._local = threading.local()
+        self._touched = {}  # key -> last access not yet written to the index
+        self._hits = 0
+        self._touch_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def _db(self):
+        # sqlite connections can't cross threads (or forks), so keep one per thread and process
+        db = getattr(self._local, 'db', None)
+        if db is None or getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'), timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, size INTEGER, last_access REAL)')
+            db.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)')
+            self._create_tables(db)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _create_tables(self, db):
+        """Hook for subclasses that keep extra state in the index"""
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}{self.extension}')
+
+    def _count(self, db, name, amount=1):
+        db.execute('INSERT INTO stats (name, value) VALUES (?, ?) '
+                   'ON CONFLICT(name) DO UPDATE SET value = value + ?', (name, amount, amount))
+
+    def get(self, key):
+        """Path of the cached file for key, or None; counts the hit or miss"""
+        db = self._db()
+        row = db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or not os.path.exists(self.path(key)):
+            if row is not None:
+                db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._count(db, 'misses')
+            return None
+        db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+        self._count(db, 'hits')
+        return self.path(key)
+
+    def lookup(self, key):
+        """Path of the cached file for key, or None, without a write to the index per hit.
+
+        For hot paths: hits and access times are kept in memory and written
+        in one transaction every TOUCH_FLUSH_INTERVAL seconds. Misses aren't
+        counted; callers that go on to fill the entry call get() for that.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with self._touch_lock:
+            self._touched[key] = time.time()
+            self._hits += 1
+            due = time.monotonic() - self._flushed_at >= TOUCH_FLUSH_INTERVAL
+        if due:
+            self.flush_touches()
+        return path
+
+    def flush_touches(self):
+        """Write the access times and hits lookup() has batched up"""
+        with self._touch_lock:
+            touched, hits = self._touched, self._hits
+            self._touched, self._hits = {}, 0
+            self._flushed_at = time.monotonic()
+        if not touched:
+            return
+        db = self._db()
+        try:
+            db.execute('BEGIN')
+            db.executemany('UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?',
+                           [(accessed, key) for key, accessed in touched.items()])
+            self._count(db, 'hits', hits)
+            db.execute('COMMIT')
+        except sqlite3.Error as e:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            logger.error(f"❌ Error recording cache hits: {str(e)}")
+
+    def put(self, key, data):
+        """Store data for key and evict least recently used entries over the byte cap"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return self._store(key, tmp_path, len(data))
+
+    def write_through(self, key, chunks, tmp_path=None):
+        """Yield chunks while writing them to the cache; only a complete stream is stored.
+
+        Pass tmp_path to write the partial file somewhere other readers can find it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if tmp_path is None:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        else:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        size = 0
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    f.flush()  # Readers following the partial file see each chunk straight away
+                    size += len(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            # A client that disconnects mid-stream leaves a truncated file behind; never index it
+            if complete:
+                self._store(key, tmp_path, size)
+            else:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _store(self, key, tmp_path, size):
+        db = self._db()
+        os.replace(tmp_path, self.path(key))
+        db.execute('INSERT OR REPLACE INTO entries (key, size, last_access) VALUES (?, ?, ?)',
+                   (key, size, time.time()))
+        self._stored(db, key)
+        self._evict(db)
+        return self.path(key)
+
+    def _stored(self, db, key):
+        """Hook called after key is written"""
+
+    def _evict(self, db):
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            try:
+                os.remove(self.path(key))
+            except OSError as e:
+                logger.error(f"Error removing cached file {key}: {str(e)}")
+            total -= size
+            self._count(db, 'evictions')
+
+    def stats(self):
+        self.flush_touches()
+        db = self._db()
+        counters = dict(db.execute('SELECT name, value FROM stats').fetchall())
+        entries, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes
+        }
@@ -0,0 +1,31 @@
+"""Content-only page fragments for blog.js in-site navigation.
+
+A request carrying "X-Fragment: 1" (or ?fragment=1) renders just the page's
+content block through templates/fragment.html instead of base.html, so
+client-side navigation skips the shell, header and scripts it would
+otherwise download and throw away.
+"""
+from flask import has_request_context, request
+
+FRAGMENT_HEADER = 'X-Fragment'
+FRAGMENT_PARAM = 'fragment'
+
+
+def is_fragment_request():
+    if not has_request_context():
+        return False
+    return request.headers.get(FRAGMENT_HEADER) == '1' or request.args.get(FRAGMENT_PARAM) == '1'
+
+
+def init_app(app):
+    @app.context_processor
+    def inject_layout():
+        fragment = is_fragment_request()
+        return {'fragment': fragment, 'layout': 'fragment.html' if fragment else 'base.html'}
+
+    @app.after_request
+    def vary_on_fragment(response):
+        # Shared caches must not hand a fragment to a full-page request or vice versa
+        if response.mimetype == 'text/html':
+            response.vary.add(FRAGMENT_HEADER)
+        return response
@@ -0,0 +1,257 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+from dotenv import load_dotenv
+import upstream
+from refresher import Refresher
+from snapshot import CACHE_DIR, RefreshLock, read_json, write_json_atomic
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# GitHub API Configuration
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+GITHUB_USERNAME = os.getenv('GITHUB_USERNAME', 'outsidebryce')
+GITHUB_GRAPHQL_URL = os.getenv('GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+
+# The calendar only changes a few times a day, so refresh hourly and
+# keep serving the last good copy while a refresh is in flight
+REFRESH_INTERVAL = int(os.getenv('GITHUB_REFRESH_INTERVAL', 3600))
+RETRY_INTERVAL = 60
+REQUEST_TIMEOUT = (3.05, 10)
+
+CACHE_FILE = os.path.join(CACHE_DIR, 'github_contributions.json')
+
+WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+GRID_ROWS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+GRID_WEEKS = 52
+
+QUERY = """
+query($username:String!, $from:DateTime!, $to:DateTime!) {
+  user(login: $username) {
+    contributionsCollection(from: $from, to: $to) {
+      contributionCalendar {
+        totalContributions
+        weeks {
+          contributionDays {
+            contributionCount
+            date
+            weekday
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+_lock = threading.Lock()
+_contributions = None
+_fetched_at = 0
+_ready = threading.Event()  # Set once any calendar is in memory
+
+
+def contribution_level(count):
+    """Bucket a day's contribution count into one of the calendar's colour levels"""
+    if count == 0:
+        return 0
+    if count < 2:
+        return 1
+    if count < 4:
+        return 2
+    if count < 6:
+        return 3
+    if count < 8:
+        return 4
+    return 5
+
+
+def build_contributions(calendar, end_date):
+    """Turn a raw contributionCalendar into the precomputed grid the template renders"""
+    # Generate list of months for the contribution graph
+    months = []
+    current_date = end_date
+    for _ in range(13):  # 13 months to account for partial months
+        months.append(current_date.strftime('%b'))
+        current_date = current_date.replace(day=1) - timedelta(days=1)  # Go to last day of previous month
+
+    data = {}
+    dates = {}
+    for week in calendar['weeks']:
+        for day in week['contributionDays']:
+            date = datetime.fromisoformat(day['date'])
+            week_number = (end_date - date).days // 7
+            key = f"{WEEKDAYS[date.weekday()]}-{week_number}"
+            data[key] = day['contributionCount']
+            dates[key] = date.strftime("%B %d, %Y")
+
+    grid = []
+    for weekday in GRID_ROWS:
+        cells = []
+        for i in range(GRID_WEEKS):
+            key = f"{weekday}-{i}"
+            count = data.get(key, 0)
+            cells.append({
+                'count': count,
+                'date': dates.get(key, ''),
+                'level': contribution_level(count)
+            })
+        grid.append({'day': weekday, 'cells': cells})
+
+    return {
+        'total': calendar['totalContributions'],
+        'months': months,
+        'grid': grid,
+        'generated_at': end_date.isoformat()
+    }
+
+
+def fetch_github_contributions(token=GITHUB_TOKEN, deadline=None):
+    """Fetch the contributions calendar from GitHub and precompute the grid"""
+    if not token:
+        logger.error("❌ Missing GITHUB_TOKEN environment variable")
+        return None
+
+    # Calculate date range - ensure we get a full year including today
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=364)
+
+    variables = {
+        "username": GITHUB_USERNAME,
+        "from": start_date.strftime("%Y-%m-%dT00:00:00"),  # Start at beginning of start date
+        "to": end_date.strftime("%Y-%m-%dT23:59:59")       # End at end of end date
+    }
+
+    try:
+        response = upstream.post(
+            GITHUB_GRAPHQL_URL,
+            json={'query': QUERY, 'variables': variables},
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=REQUEST_TIMEOUT,
+            deadline=deadline,
+            service='github'
+        )
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ Error fetching GitHub contributions: {str(e)}")
+        return None
+
+    if response.status_code != 200:
+        logger.error(f"GitHub API Error: {response.status_code}")
+        return None
+
+    try:
+        calendar = response.json()['data']['user']['contributionsCollection']['contributionCalendar']
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"❌ Unexpected GitHub response: {str(e)}")
+        return None
+
+    return build_contributions(calendar, end_date)
+
+
+def _load_from_disk():
+    """Load the last good calendar written by any process"""
+    payload = read_json(CACHE_FILE)
+    try:
+        return payload['contributions'], payload['fetched_at']
+    except (KeyError, TypeError):
+        return None, 0
+
+
+def _save_to_disk(contributions, fetched_at):
+    """Atomically persist the calendar so restarts and other workers start warm"""
+    try:
+        write_json_atomic(CACHE_FILE, {'contributions': contributions, 'fetched_at': fetched_at})
+    except OSError as e:
+        logger.error(f"❌ Error saving GitHub contributions: {str(e)}")
+
+
+def _swap(contributions, fetched_at):
+    global _contributions, _fetched_at
+    with _lock:
+        _contributions = contributions
+        _fetched_at = fetched_at
+    _ready.set()
+
+
+def refresh_contributions(deadline=None):
+    """Fetch a fresh calendar and swap it in; keeps the old one on failure"""
+    contributions = fetch_github_contributions(deadline=deadline)
+    if contributions is None:
+        return False
+
+    fetched_at = time.time()
+    _swap(contributions, fetched_at)
+    _save_to_disk(contributions, fetched_at)
+    logger.info(f"✅ Refreshed GitHub contributions ({contributions['total']} total)")
+    return True
+
+
+def _refresh_step():
+    """Keep the calendar fresh; returns how long to sleep before the next check"""
+    age = time.time() - _fetched_at
+    if age < REFRESH_INTERVAL:
+        return REFRESH_INTERVAL - age
+    # Another worker may have refreshed the file while we slept
+    contributions, fetched_at = _load_from_disk()
+    if contributions and fetched_at > _fetched_at:
+        _swap(contributions, fetched_at)
+        return 0
+    with RefreshLock('github_contributions') as lock:
+        refreshed = False
+        if lock.acquired:
+            # The previous winner may have published while we waited
+            contributions, fetched_at = _load_from_disk()
+            if contributions and time.time() - fetched_at < REFRESH_INTERVAL:
+                _swap(contributions, fetched_at)
+                refreshed = True
+            else:
+                refreshed = refresh_contributions()
+    # Lost the election or GitHub failed; pick up the winner's file later
+    return 0 if refreshed else RETRY_INTERVAL
+
+
+_refresher = Refresher('github-contributions', _refresh_step)
+
+
+def preload_contributions(deadline=None):
+    """Load the calendar into this process without starting the refresher thread.
+
+    A stale calendar on disk is used as is; the workers' refreshers renew it.
+    """
+    if _contributions is None:
+        contributions, fetched_at = _load_from_disk()
+        if contributions:
+            _swap(contributions, fetched_at)
+    if _contributions is None:
+        refresh_contributions(deadline=deadline)
+    return _contributions
+
+
+def start_refresher():
+    """Start the background refresher for this process (safe to call repeatedly)"""
+    _refresher.start()
+
+
+def contributions_version():
+    """Changes whenever a new calendar is swapped in"""
+    return _fetched_at
+
+
+def get_github_contributions(timeout=0):
+    """Return the last good precomputed calendar without touching GitHub.
+
+    On a cold start, wait up to timeout seconds for the refresher's first fetch.
+    """
+    if _contributions is None:
+        contributions, fetched_at = _load_from_disk()
+        if contributions:
+            _swap(contributions, fetched_at)
+    start_refresher()
+    if _contributions is None and timeout:
+        _ready.wait(timeout)
+    return _contributions
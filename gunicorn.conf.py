@@ -0,0 +1,31 @@
+"""gunicorn settings for production; gunicorn reads this file from the working directory.
+
+preload_app imports server.py once in the master, and on_starting warms
+its caches (warmup.py) before the listening socket is opened, so workers
+fork with the content already in shared memory and nothing is routed to
+the machine until it is warm. WEB_CONCURRENCY sets the worker count.
+
+Each worker publishes its metrics for /metrics to sum (metrics.py), and
+writes them one last time as it exits.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+preload_app = True
+
+
+def on_starting(server):
+    from server import app
+    from warmup import warm_up
+    warm_up(app)
+
+
+def post_fork(server, worker):
+    import metrics
+    metrics.publish()
+
+
+def worker_exit(server, worker):
+    import metrics
+    metrics.registry.flush(force=True)
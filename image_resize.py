@@ -0,0 +1,185 @@
+"""Resize images in static/images on demand, in the best format the client accepts.
+
+/img/<path>?w=<width> serves a source from static/images at a width from
+the allow-list, as AVIF, WebP or JPEG/PNG according to the Accept header.
+Encoded variants go to a bounded disk cache keyed by the source's
+size, mtime, width and format. Concurrent requests for the same variant
+share one encode, across workers too: the encoding worker holds a flock
+on <variant>.lock and the others wait for it, then serve its file. A
+cached variant is served without opening the source with Pillow or
+writing to the cache index.
+"""
+import hashlib
+import io
+import logging
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: every worker encodes for itself
+    fcntl = None
+
+from disk_cache import DiskCache
+from responsive_images import AVIF_AVAILABLE, QUALITY, SOURCE_DIR, SOURCE_EXTENSIONS, WIDTHS, register_avif
+from singleflight import SingleFlight
+from snapshot import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join(CACHE_DIR, 'img'))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 100 * 1024 * 1024))
+ENCODE_TIMEOUT = 30  # Followers give up on a stuck encode after this long
+CLAIM_POLL_INTERVAL = 0.05  # Seconds between checks on another worker's encode
+MAX_KNOWN_SOURCES = 1024
+JPEG_QUALITY = 82
+
+MIMETYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+SAVE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': QUALITY['avif'], 'speed': 8},
+    'webp': {'format': 'WEBP', 'quality': QUALITY['webp'], 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+image_cache = DiskCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+_encodes = SingleFlight()
+_sources = {}  # (path, size, mtime) -> (width, has_alpha), so each source is opened once per process
+
+
+def negotiate_format(accept, has_alpha):
+    """Best format the Accept header allows; JPEG/PNG are the universal fallback"""
+    accept = (accept or '').lower()
+    if AVIF_AVAILABLE and 'image/avif' in accept:
+        return 'avif'
+    if 'image/webp' in accept:
+        return 'webp'
+    return 'png' if has_alpha else 'jpeg'
+
+
+def source_path(static_folder, filename):
+    """Absolute path of a resizable source under static/images, or None"""
+    root = os.path.realpath(os.path.join(static_folder, SOURCE_DIR))
+    path = os.path.realpath(os.path.join(root, filename))
+    if not path.startswith(root + os.sep) or not path.lower().endswith(SOURCE_EXTENSIONS):
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def _pil_image():
+    # Deferred so booting a worker doesn't import Pillow before the first /img request
+    from PIL import Image
+    register_avif()
+    return Image
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _encode(path, width, fmt):
+    Image = _pil_image()
+    image = Image.open(path)
+    image.load()
+    image = image.convert('RGBA' if _has_alpha(image) and fmt != 'jpeg' else 'RGB')
+    if width < image.width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, **SAVE_OPTIONS[fmt])
+    return output.getvalue()
+
+
+class _EncodeClaim:
+    """Cross-worker flock on encoding one variant; blocks until it is free or timeout passes"""
+
+    def __init__(self, key, timeout):
+        self.path = image_cache.path(key) + '.lock'
+        self.timeout = timeout
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        os.makedirs(image_cache.directory, exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            lock_file = open(self.path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for another worker to encode {os.path.basename(self.path)}")
+                time.sleep(CLAIM_POLL_INTERVAL)
+                continue
+            try:
+                if os.stat(self.path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                    self._file = lock_file
+                    return self
+            except OSError:
+                pass
+            # Locked a file the previous holder had already unlinked; start over on the current one
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            # Unlinked while still held, so lock files don't pile up next to evicted variants
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        return False
+
+
+def _source_info(path, stat):
+    """(width, has_alpha) of a source, read from its header the first time this process sees it"""
+    version = (path, stat.st_size, stat.st_mtime_ns)
+    info = _sources.get(version)
+    if info is None:
+        with _pil_image().open(path) as image:
+            info = (image.width, _has_alpha(image))
+        if len(_sources) >= MAX_KNOWN_SOURCES:
+            _sources.clear()
+        _sources[version] = info
+    return info
+
+
+def resized_image(path, width, accept):
+    """(cache path, mimetype) of path at width in the best accepted format"""
+    stat = os.stat(path)
+    source_width, has_alpha = _source_info(path, stat)
+    # Never upscale: widths past the source all map to the original size
+    width = min(width, source_width)
+    fmt = negotiate_format(accept, has_alpha)
+    # Size and mtime change whenever the source is replaced, so stale variants just age out
+    digest = hashlib.sha256(f'{path}:{stat.st_size}:{stat.st_mtime_ns}:{width}'.encode()).hexdigest()
+    key = f'{digest}.{fmt}'
+
+    cached = image_cache.lookup(key)
+    if cached is None:
+        # Counts the miss, and catches an encode that landed since the lookup
+        cached = image_cache.get(key)
+    if cached is None:
+        def encode():
+            # SingleFlight coalesces this worker's requests; the claim waits out the other workers'
+            with _EncodeClaim(key, ENCODE_TIMEOUT):
+                # Another worker may have finished it while we waited
+                if os.path.exists(image_cache.path(key)):
+                    return image_cache.path(key)
+                logger.debug(f"🔄 Encoding {os.path.basename(path)} at {width}px as {fmt}")
+                return image_cache.put(key, _encode(path, width, fmt))
+        cached = _encodes.do(key, encode, timeout=ENCODE_TIMEOUT)
+    return cached, MIMETYPES[fmt]
+
+
+def parse_width(value):
+    """Width from the ?w= query string if it is on the allow-list, else None"""
+    try:
+        width = int(value)
+    except (TypeError, ValueError):
+        return None
+    return width if width in WIDTHS else None
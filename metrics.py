@@ -0,0 +1,283 @@
+"""Request phase timings (Server-Timing) and Prometheus metrics.
+
+timed('phase') measures a block of the hot path: the total is added to
+the current request's Server-Timing header and to a per-process
+registry of counters and histograms. Each gunicorn worker periodically
+writes its registry to CACHE_DIR/metrics/<pid>-<start>.json, and /metrics sums
+every worker's file, so a scrape sees the whole machine whichever worker
+answers it.
+
+Only processes that call publish() (gunicorn workers, from the hooks in
+gunicorn.conf.py) write files. Scripts, the master and tests keep their
+counters in memory, where only their own /metrics can see them.
+"""
+import glob
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from cachetools import TTLCache
+from flask import g, has_request_context, request
+
+from snapshot import CACHE_DIR, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(CACHE_DIR, 'metrics'))
+FLUSH_INTERVAL = 5  # Seconds between writes of this worker's registry
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STALE_WORKER_AGE = 24 * 3600  # Files of workers that stopped writing this long ago are dropped
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests by endpoint, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by endpoint'),
+    'server_phase_seconds_total': ('counter', 'Time spent per request phase'),
+    'upstream_requests_total': ('counter', 'Outbound requests by service and outcome'),
+    'upstream_request_duration_seconds': ('histogram', 'Outbound request latency by service'),
+    'cache_requests_total': ('counter', 'In-memory cache lookups by cache and result'),
+    'cache_evictions_total': ('counter', 'In-memory cache entries evicted to stay within size'),
+}
+
+
+class Registry:
+    """This process's counters and histograms; reset after a fork"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        # Start time too, so a recycled pid doesn't overwrite a dead worker's totals
+        self.name = f'{self.pid}-{int(time.time() * 1000)}'
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._flushed_at = 0
+        self.publishing = False  # A forked child decides for itself, see publish()
+
+    def _check_pid(self):
+        if self.pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        with self._lock:
+            self._check_pid()
+            buckets = self.histograms.get((name, labels))
+            if buckets is None:
+                buckets = self.histograms[(name, labels)] = [0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[len(LATENCY_BUCKETS)] += 1
+            buckets[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            self._check_pid()
+            return {
+                'updated_at': time.time(),
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), buckets] for (name, labels), buckets in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        self._check_pid()
+        if not self.publishing or not (self.counters or self.histograms):
+            return
+        now = time.time()
+        if not force and now - self._flushed_at < FLUSH_INTERVAL:
+            return
+        self._flushed_at = now
+        try:
+            write_json_atomic(os.path.join(METRICS_DIR, f'{self.name}.json'), self.snapshot())
+        except OSError as e:
+            logger.error(f"❌ Error writing metrics: {str(e)}")
+
+
+registry = Registry()
+
+
+def publish():
+    """Write this process's registry to METRICS_DIR from now on; call in each serving worker"""
+    registry._check_pid()
+    registry.publishing = True
+
+
+def _labels(**labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+@contextmanager
+def timed(phase):
+    """Time a block as a Server-Timing phase of the current request (if any)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.inc('server_phase_seconds_total', _labels(phase=phase), elapsed)
+        if has_request_context():
+            timings = g.setdefault('server_timing', {})
+            timings[phase] = timings.get(phase, 0.0) + elapsed
+
+
+def record_upstream(service, elapsed, outcome):
+    """Count one outbound request; outcome is 'ok', 'http_error' or 'error'"""
+    registry.inc('upstream_requests_total', _labels(service=service, outcome=outcome))
+    registry.observe('upstream_request_duration_seconds', elapsed, _labels(service=service))
+
+
+def record_cache(cache, result):
+    """Count one in-memory cache lookup; result is 'hit' or 'miss'"""
+    registry.inc('cache_requests_total', _labels(cache=cache, result=result))
+
+
+def record_eviction(cache):
+    registry.inc('cache_evictions_total', _labels(cache=cache))
+
+
+class InstrumentedTTLCache(TTLCache):
+    """TTLCache that counts get() hits and misses, and entries evicted for space"""
+
+    def __init__(self, name, maxsize, ttl):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.name = name
+        self._clearing = False
+
+    def get(self, key, default=None):
+        # One lookup: checking `key in self` first could pass just before the entry expires
+        try:
+            value = self[key]
+        except KeyError:
+            record_cache(self.name, 'miss')
+            return default
+        record_cache(self.name, 'hit')
+        return value
+
+    def popitem(self):
+        # Called to make room, and by clear(); expired entries go through expire() instead
+        if not self._clearing:
+            record_eviction(self.name)
+        return super().popitem()
+
+    def clear(self):
+        self._clearing = True
+        try:
+            super().clear()
+        finally:
+            self._clearing = False
+
+
+def _add(snapshot, counters, histograms):
+    for name, labels, value in snapshot.get('counters', []):
+        key = (name, tuple(tuple(label) for label in labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, buckets in snapshot.get('histograms', []):
+        key = (name, tuple(tuple(label) for label in labels))
+        total = histograms.setdefault(key, [0] * len(buckets))
+        for i, value in enumerate(buckets):
+            total[i] += value
+
+
+def collect():
+    """Sum every worker's latest registry, including this one's"""
+    registry.flush(force=True)
+    counters, histograms = {}, {}
+    if not registry.publishing:
+        # Single-process server: this registry isn't in the files
+        _add(registry.snapshot(), counters, histograms)
+    now = time.time()
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        snapshot = read_json(path)
+        if not isinstance(snapshot, dict):
+            continue
+        if now - snapshot.get('updated_at', 0) > STALE_WORKER_AGE:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        _add(snapshot, counters, histograms)
+    return counters, histograms
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def render_prometheus(counters, histograms):
+    """Prometheus text exposition format (0.0.4)"""
+    lines = []
+    described = set()
+
+    def describe(name):
+        if name not in described and name in HELP:
+            kind, text = HELP[name]
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+            described.add(name)
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name)
+        lines.append(f'{name}{_format_labels(labels)} {value:g}')
+    for (name, labels), buckets in sorted(histograms.items()):
+        describe(name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, buckets):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", f"{bound:g}")])} {cumulative}')
+        cumulative += buckets[len(LATENCY_BUCKETS)]
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {buckets[-1]:g}')
+        lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Time every request, add Server-Timing and count it by endpoint"""
+
+    class TimedTemplate(app.jinja_env.template_class):
+        def render(self, *args, **kwargs):
+            with timed('render'):
+                return super().render(*args, **kwargs)
+
+    app.jinja_env.template_class = TimedTemplate
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        registry.inc('http_requests_total', _labels(endpoint=endpoint, method=request.method,
+                                                    status=response.status_code))
+        registry.observe('http_request_duration_seconds', elapsed, _labels(endpoint=endpoint))
+
+        timings = g.get('server_timing', {})
+        entries = [f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in timings.items()]
+        entries.append(f'total;dur={elapsed * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(entries)
+        registry.flush()
+        return response
@@ -0,0 +1,135 @@
+"""Rendered-page output cache.
+
+Pages are a pure function of the route, its arguments and the content
+version, so the rendered bytes (and their compressed variants) are kept
+in a bounded LRU and served with an ETag and Last-Modified that clients
+can revalidate against.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.wrappers import Response
+
+from compression import compress_variants, is_compressible, negotiate
+from fragments import is_fragment_request
+from metrics import record_cache, record_eviction, timed
+
+MAX_ENTRIES = 256
+MAX_BYTES = 32 * 1024 * 1024
+
+
+class CachedPage:
+    """A rendered body plus its precompressed variants, built once per render"""
+
+    __slots__ = ('body', 'mimetype', 'etag', 'last_modified', 'max_age', 'variants', 'size')
+
+    def __init__(self, body, mimetype, max_age=0):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = time.time()
+        self.max_age = max_age
+        with timed('compress'):
+            self.variants = compress_variants(body) if is_compressible(mimetype) else {}
+        self.size = len(body) + sum(len(v) for v in self.variants.values())
+
+    def to_response(self):
+        encoding = negotiate(self.variants)
+        response = Response(self.variants[encoding] if encoding else self.body, mimetype=self.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if self.variants:
+            response.vary.add('Accept-Encoding')
+        # Each encoding is its own representation, so it needs its own strong ETag
+        response.set_etag(f'{self.etag}-{encoding}' if encoding else self.etag)
+        response.last_modified = self.last_modified
+        # Let browsers and the edge keep a copy for max_age, then revalidate
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        if not self.max_age:
+            response.cache_control.must_revalidate = True
+        return response.make_conditional(request)
+
+
+class PageCache:
+    """Thread-safe LRU bounded by entry count and total bytes (variants included)"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                record_cache('pages', 'miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache('pages', 'hit')
+            return entry
+
+    def set(self, key, entry):
+        size = entry.size
+        if size > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+                record_eviction('pages')
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+page_cache = PageCache()
+
+
+def cached_page(version, max_age=0, query_args=()):
+    """Cache a view's rendered output, keyed by route, arguments, host, fragment mode and version().
+
+    version() must change whenever anything the page renders changes.
+    query_args names the query string parameters the view reads; they
+    join the key, and any others are ignored.
+    Only 200 responses are cached; aborts and errors pass straight through.
+    Bodies are compressed once here, never per request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            query = tuple(request.args.get(name) for name in query_args)
+            key = (request.endpoint, tuple(sorted(kwargs.items())), query, request.host_url, is_fragment_request(), version())
+            with timed('cache'):
+                entry = page_cache.get(key)
+            if entry is None:
+                response = current_app.make_response(view(**kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = page_cache.set(key, CachedPage(response.get_data(), response.mimetype, max_age))
+            return entry.to_response()
+        return wrapper
+    return decorator
@@ -0,0 +1,342 @@
+"""Sync-time post-processing of Ghost post HTML.
+
+Runs once per post version, when a sync or webhook publishes the posts
+snapshot, never on the request path. Each post gets an 'html_processed'
+field next to Ghost's 'html' with:
+
+- loading="lazy" and decoding="async" on every image
+- width/height on images that lack them, read from the image header
+  for images hosted on our Ghost site, so the layout doesn't shift
+- a srcset/sizes built from Ghost's /content/images/size/w<N>/ resizer
+- whitespace collapsed and comments dropped outside <pre>, <textarea>,
+  <script> and <style>
+- ids on h2/h3 headings, collected into an 'outline' for a table of contents
+
+Posts whose id, updated_at and PIPELINE_VERSION match an already
+processed copy reuse it, so hourly full syncs don't redo the work.
+
+Processing never touches the network. Image sizes come from
+IMAGE_SIZES_FILE, shared by every worker; images not in it yet are
+returned as unsized, and their posts are left without a
+processed_version so the next publish redoes them. probe_image_sizes()
+fills the file in the background (see api_config._size_images).
+"""
+import html
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+import upstream
+from snapshot import CACHE_DIR, file_mtime, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_VERSION = 1  # Bump when the output changes, so every post is reprocessed
+GHOST_IMAGE_PATH = '/content/images/'
+SRCSET_WIDTHS = (600, 1000, 1600, 2000)  # Widths Ghost's image resizer serves
+IMAGE_SIZES = '(min-width: 768px) 720px, 100vw'  # The post column is at most ~720px wide
+OUTLINE_TAGS = ('h2', 'h3')
+PRESERVE_TAGS = frozenset(('pre', 'textarea', 'script', 'style'))
+BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'iframe', 'li', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul', 'video'
+))
+
+IMAGE_SIZES_FILE = os.path.join(CACHE_DIR, 'image_sizes.json')
+PROBE_BYTES = 64 * 1024  # Enough of a JPEG/PNG/WebP/GIF to find its dimensions
+PROBE_TIMEOUT = (2, 5)
+PROBE_WORKERS = 8
+PROBE_BUDGET = 20  # Seconds per background probe pass; images it doesn't reach wait for the next one
+MAX_KNOWN_SIZES = 4096
+
+SIZE_PATH_RE = re.compile(r'/content/images/size/w\d+/')
+WHITESPACE_RE = re.compile(r'\s+')
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+_known_sizes = {}  # url -> [width, height], or None for images that can't be read
+_known_sizes_mtime = None
+
+
+def _serialize(tag, attrs, self_closing=False):
+    parts = [tag]
+    for name, value in attrs:
+        parts.append(name if value is None else f'{name}="{html.escape(value, quote=True)}"')
+    return f"<{' '.join(parts)}{' /' if self_closing else ''}>"
+
+
+def _ghost_host():
+    # Read per call: the .env file is loaded after this module is imported
+    return urlparse(os.getenv('GHOST_URL') or '').netloc
+
+
+def is_ghost_image(url):
+    """Whether url is an image on a Ghost site, which Ghost's resizer can handle"""
+    if not url or GHOST_IMAGE_PATH not in url:
+        return False
+    host = urlparse(url).netloc
+    return not host or host == _ghost_host() or host.endswith('.ghost.io')
+
+
+def original_image_url(url):
+    return SIZE_PATH_RE.sub(GHOST_IMAGE_PATH, url)
+
+
+def ghost_srcset(url, width=None):
+    """srcset of Ghost resizer URLs for an image, never wider than the original"""
+    original = original_image_url(url)
+    widths = [w for w in SRCSET_WIDTHS if width is None or w < width]
+    candidates = [f"{original.replace(GHOST_IMAGE_PATH, f'{GHOST_IMAGE_PATH}size/w{w}/', 1)} {w}w" for w in widths]
+    if width is not None:
+        candidates.append(f'{original} {width}w')
+    return ', '.join(candidates)
+
+
+def is_probeable(url):
+    """Whether url is an image on our own Ghost site, whose header we may fetch"""
+    return url.startswith(('http://', 'https://')) and urlparse(url).netloc == _ghost_host()
+
+
+def known_sizes():
+    """{url: [width, height] or None} of every image probed so far, by any worker"""
+    global _known_sizes, _known_sizes_mtime
+    mtime = file_mtime(IMAGE_SIZES_FILE)
+    if mtime != _known_sizes_mtime:
+        sizes = read_json(IMAGE_SIZES_FILE)
+        _known_sizes = sizes if isinstance(sizes, dict) else {}
+        _known_sizes_mtime = mtime
+    return _known_sizes
+
+
+def _probe(url, deadline):
+    """(settled, size): size from the image's first bytes, None if it isn't a readable image.
+
+    Not settled when the deadline or a network error cut it short, so it is tried again later.
+    """
+    from PIL import ImageFile  # Deferred: only probe passes need Pillow
+
+    if time.monotonic() >= deadline:
+        return False, None
+    try:
+        with upstream.get(url, headers={'Range': f'bytes=0-{PROBE_BYTES - 1}'}, stream=True,
+                          timeout=PROBE_TIMEOUT, deadline=deadline, retries=0, service='ghost') as response:
+            if response.status_code not in (200, 206):
+                return response.status_code < 500, None
+            parser = ImageFile.Parser()
+            for chunk in response.iter_content(chunk_size=8192):
+                parser.feed(chunk)
+                if parser.image is not None:
+                    return True, list(parser.image.size)
+            return True, None
+    except Exception as e:
+        logger.debug(f"🔄 Couldn't read the size of {url}: {str(e)}")
+        return False, None
+
+
+def probe_image_sizes(urls, budget=PROBE_BUDGET):
+    """Read the sizes of urls concurrently and record them in IMAGE_SIZES_FILE; returns how many settled"""
+    urls = [original_image_url(url) for url in urls]
+    urls = [url for url in dict.fromkeys(urls) if is_probeable(url)]
+    if not urls:
+        return 0
+    deadline = time.monotonic() + budget
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix='image-probe') as executor:
+        results = list(executor.map(lambda url: _probe(url, deadline), urls))
+    settled = {url: size for url, (done, size) in zip(urls, results) if done}
+    if settled:
+        sizes = dict(known_sizes())
+        sizes.update(settled)
+        # Oldest first, so the cap drops images probed longest ago
+        sizes = dict(list(sizes.items())[-MAX_KNOWN_SIZES:])
+        try:
+            write_json_atomic(IMAGE_SIZES_FILE, sizes)
+        except OSError as e:
+            logger.error(f"❌ Error writing image sizes: {str(e)}")
+    logger.info(f"✅ Read the sizes of {len(settled)} of {len(urls)} images")
+    return len(settled)
+
+
+def _slug(text):
+    return SLUG_RE.sub('-', text.lower()).strip('-') or 'section'
+
+
+class PostHTMLProcessor(HTMLParser):
+    """Streams Ghost HTML back out with the transforms applied; see process_html"""
+
+    def __init__(self, sizes=None):
+        super().__init__(convert_charrefs=False)
+        self.sizes = known_sizes() if sizes is None else sizes
+        self.unsized = []  # Probeable images whose size isn't known yet
+        self.out = []
+        self.outline = []
+        self._ids = set()
+        self._preserve = 0  # Depth inside tags whose whitespace matters
+        self._space = False  # Collapsed whitespace, kept only if the tags around it are inline
+        self._after_block = True
+        self._heading = None  # [tag, output index, attrs, text parts] while inside an outline heading
+
+    def _tag(self, tag, text):
+        block = tag in BLOCK_TAGS
+        if self._space and not block and not self._after_block:
+            self.out.append(' ')
+        self._space = False
+        self.out.append(text)
+        self._after_block = block
+
+    def _text(self, text):
+        if self._space and not self._after_block:
+            self.out.append(' ')
+        self._space = False
+        self.out.append(text)
+        self._after_block = False
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=True)
+
+    def _start(self, tag, attrs, self_closing):
+        if tag == 'img':
+            self._tag(tag, _serialize(tag, self._image_attrs(attrs), self_closing))
+        elif tag in OUTLINE_TAGS and self._heading is None:
+            self._tag(tag, None)  # Filled in at the end tag, once the text (and so the id) is known
+            self._heading = [tag, len(self.out) - 1, attrs, []]
+        else:
+            self._tag(tag, self.get_starttag_text())
+        if tag in PRESERVE_TAGS and not self_closing:
+            self._preserve += 1
+
+    def handle_endtag(self, tag):
+        if tag in PRESERVE_TAGS and self._preserve:
+            self._preserve -= 1
+        if self._heading is not None and tag == self._heading[0]:
+            self._finish_heading()
+        self._tag(tag, f'</{tag}>')
+
+    def _finish_heading(self):
+        tag, index, attrs, text = self._heading
+        self._heading = None
+        title = WHITESPACE_RE.sub(' ', html.unescape(''.join(text))).strip()
+        heading_id = dict(attrs).get('id')
+        if not heading_id:
+            base = heading_id = _slug(title)
+            suffix = 2
+            while heading_id in self._ids:
+                heading_id = f'{base}-{suffix}'
+                suffix += 1
+            attrs = list(attrs) + [('id', heading_id)]
+        self._ids.add(heading_id)
+        self.out[index] = _serialize(tag, attrs)
+        if title:
+            self.outline.append({'level': int(tag[1]), 'id': heading_id, 'text': title})
+
+    def _image_attrs(self, attrs):
+        attributes = dict(attrs)
+        src = attributes.get('src')
+        if is_ghost_image(src):
+            if not (attributes.get('width') and attributes.get('height')):
+                original = original_image_url(src)
+                size = self.sizes.get(original)
+                if size:
+                    attributes['width'], attributes['height'] = str(size[0]), str(size[1])
+                elif original not in self.sizes and is_probeable(original):
+                    self.unsized.append(original)
+            if not attributes.get('srcset'):
+                width = attributes.get('width')
+                attributes['srcset'] = ghost_srcset(src, int(width) if width and width.isdigit() else None)
+                attributes.setdefault('sizes', IMAGE_SIZES)
+        attributes.setdefault('loading', 'lazy')
+        attributes.setdefault('decoding', 'async')
+        return list(attributes.items())
+
+    def handle_data(self, data):
+        if self._heading is not None:
+            self._heading[3].append(data)
+        if self._preserve:
+            self._text(data)
+            return
+        collapsed = WHITESPACE_RE.sub(' ', data)
+        if collapsed.startswith(' '):
+            self._space = True
+        text = collapsed.strip(' ')
+        if text:
+            self._text(text)
+            self._space = collapsed.endswith(' ')
+
+    def handle_entityref(self, name):
+        self.handle_data(f'&{name};')
+
+    def handle_charref(self, name):
+        self.handle_data(f'&#{name};')
+
+    def handle_comment(self, data):
+        # Ghost's card markers and editor comments don't render
+        if self._preserve:
+            self._text(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self._tag('!', f'<!{decl}>')
+
+    def unknown_decl(self, data):
+        self._text(f'<![{data}]>')
+
+    def result(self):
+        self.close()
+        if self._heading is not None:
+            # Unclosed heading: still needs its start tag written
+            self._finish_heading()
+        return ''.join(part for part in self.out if part), self.outline
+
+
+def process_html(body, sizes=None):
+    """(processed HTML, [{'level', 'id', 'text'}], [unsized image urls]) for one post body"""
+    processor = PostHTMLProcessor(sizes=sizes)
+    processor.feed(body or '')
+    html_out, outline = processor.result()
+    return html_out, outline, processor.unsized
+
+
+def _is_processed(post):
+    return post.get('processed_version') == PIPELINE_VERSION and 'html_processed' in post
+
+
+def prepare_posts(posts, previous=()):
+    """(posts with html_processed/outline, how many were processed anew, unsized image urls).
+
+    Reuses the output in posts themselves or in previous (raw posts from
+    the last snapshot) wherever id and updated_at still match. Posts with
+    unsized images get their output but no processed_version, so they
+    are processed again once probe_image_sizes() has run.
+    """
+    done = {(post['id'], post.get('updated_at')): post for post in previous or () if _is_processed(post)}
+    sizes = known_sizes()
+    prepared = []
+    processed = 0
+    unsized = []
+    for post in posts:
+        if _is_processed(post):
+            prepared.append(post)
+            continue
+        earlier = done.get((post['id'], post.get('updated_at')))
+        if earlier is not None:
+            prepared.append(dict(post, html_processed=earlier['html_processed'], outline=earlier['outline'],
+                                 processed_version=PIPELINE_VERSION))
+            continue
+        try:
+            body, outline, images = process_html(post.get('html'), sizes=sizes)
+        except Exception as e:
+            # Serve Ghost's HTML untouched rather than drop the post
+            logger.error(f"❌ Error processing HTML of post {post.get('slug')}: {str(e)}")
+            body, outline, images = post.get('html') or '', [], []
+        unsized.extend(images)
+        prepared.append(dict(post, html_processed=body, outline=outline,
+                             processed_version=None if images else PIPELINE_VERSION))
+        processed += 1
+    if processed:
+        logger.info(f"✅ Processed HTML of {processed} posts" + (f", {len(unsized)} images still unsized" if unsized else ''))
+    return prepared, processed, list(dict.fromkeys(unsized))
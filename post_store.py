@@ -0,0 +1,192 @@
+import base64
+import zlib
+from bisect import bisect_left
+
+from search_index import SearchIndex
+
+HOME_NEWS_LIMIT = 3
+EXCERPT_LENGTH = 120
+LISTING_FIELDS = ('title', 'slug', 'excerpt', 'feature_image', 'reading_time')  # What a card renders
+
+
+def truncate_excerpt(excerpt, length=EXCERPT_LENGTH):
+    """Truncate an excerpt for cards"""
+    excerpt = excerpt or ''  # Use empty string if excerpt is None
+    if len(excerpt) > length:
+        return excerpt[:length].rstrip() + '...'
+    return excerpt
+
+
+def merge_posts(posts, changed=(), removed_ids=()):
+    """Merge changed posts into a collection by id, newest published first"""
+    replaced = {post['id'] for post in changed} | set(removed_ids)
+    merged = [post for post in posts if post['id'] not in replaced]
+    merged.extend(changed)
+    merged.sort(key=lambda p: p.get('published_at') or '', reverse=True)
+    return merged
+
+
+def encode_cursor(key):
+    """Opaque listing cursor for a (published_at, id) position"""
+    return base64.urlsafe_b64encode('|'.join(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(published_at, id) from encode_cursor, or None if it is malformed"""
+    try:
+        published_at, _, post_id = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8').partition('|')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return (published_at, post_id) if post_id else None
+
+
+class PostSummary:
+    """The handful of fields list views render, without the HTML body.
+
+    Templates use attribute access, so summaries drop straight into the
+    places that used to receive raw Ghost dicts.
+    """
+
+    __slots__ = ('id', 'slug', 'title', 'excerpt', 'feature_image', 'reading_time',
+                 'published_at', 'updated_at', 'tags')
+
+    def __init__(self, id, slug, title, excerpt, feature_image, reading_time, published_at, updated_at, tags):
+        self.id = id
+        self.slug = slug
+        self.title = title
+        self.excerpt = excerpt
+        self.feature_image = feature_image
+        self.reading_time = reading_time
+        self.published_at = published_at
+        self.updated_at = updated_at
+        self.tags = tags
+
+    @classmethod
+    def from_ghost(cls, post):
+        return cls(
+            id=post['id'],
+            slug=post['slug'],
+            title=post.get('title') or '',
+            excerpt=post.get('excerpt'),
+            feature_image=post.get('feature_image'),
+            reading_time=post.get('reading_time', 0),
+            published_at=post.get('published_at') or '',
+            updated_at=post.get('updated_at') or '',
+            tags=tuple(t['slug'] for t in post.get('tags', []) if t.get('slug'))
+        )
+
+    def with_excerpt(self, excerpt):
+        return PostSummary(self.id, self.slug, self.title, excerpt, self.feature_image, self.reading_time,
+                           self.published_at, self.updated_at, self.tags)
+
+    def to_dict(self, fields=None):
+        return {field: getattr(self, field) for field in fields or self.__slots__}
+
+    def listing_key(self):
+        return (self.published_at, self.id)
+
+
+class PostStore:
+    """Immutable, indexed view over one Ghost fetch.
+
+    Built once per fetch and swapped in as a whole, so readers never see a
+    half-built index and every lookup on the request path is a dict hit.
+    Posts are held as slim summaries; HTML bodies are kept zlib-compressed
+    and only inflated for the single post a request asks for.
+    """
+
+    def __init__(self, posts, version=None, previous=None):
+        self.version = version
+        self.posts = [PostSummary.from_ghost(post) for post in posts]
+        # Served bodies are the sync-time processed HTML (post_html.py) when there is one
+        self._bodies = {post['id']: zlib.compress((post.get('html_processed', post.get('html')) or '').encode('utf-8'))
+                        for post in posts}
+        self._outlines = {post['id']: post['outline'] for post in posts if post.get('outline')}
+        # Newest edit we have seen; incremental syncs ask Ghost for anything after it
+        self.watermark = max((post.updated_at for post in self.posts), default=None)
+        self.by_slug = {post.slug: post for post in self.posts}
+        self._by_id = {post.id: post for post in self.posts}
+
+        # Tag -> posts, keeping Ghost's ordering
+        self.by_tag = {}
+        for post in self.posts:
+            for tag in dict.fromkeys(post.tags):
+                self.by_tag.setdefault(tag, []).append(post)
+
+        # (tag, slug) -> (prev, next); tag None is the untagged sequence
+        self.neighbours = {}
+        self._link(None, self.posts)
+        for tag, tagged in self.by_tag.items():
+            self._link(tag, tagged)
+
+        # Precomputed home page collections
+        news = sorted(self.by_tag.get('news', []), key=lambda p: p.published_at, reverse=True)
+        self.news = news[:HOME_NEWS_LIMIT]
+        self.playbook = self.by_tag.get('playbook', [])
+        self.tech_stack = self.by_tag.get('tech-stack', [])
+        self.case_studies = [post.with_excerpt(truncate_excerpt(post.excerpt))
+                             for post in self.by_tag.get('case-studies', [])]
+
+        # Oldest first with parallel sort keys, so a cursor page is a bisect and a slice
+        self._listings = {tag: self._listing(posts) for tag, posts in [(None, self.posts)] + list(self.by_tag.items())}
+
+        # Re-index only what changed since the store this one replaces
+        self.search_index = previous.search_index.updated(posts) if previous else SearchIndex.build(posts)
+
+    def _link(self, tag, posts):
+        last = len(posts) - 1
+        for i, post in enumerate(posts):
+            self.neighbours[(tag, post.slug)] = (
+                posts[i - 1] if i > 0 else None,
+                posts[i + 1] if i < last else None
+            )
+
+    def __len__(self):
+        return len(self.posts)
+
+    def get(self, slug):
+        return self.by_slug.get(slug)
+
+    def html(self, post):
+        """Inflate one post's HTML body"""
+        body = self._bodies.get(post.id)
+        return zlib.decompress(body).decode('utf-8') if body else ''
+
+    def full(self, slug):
+        """Full post as a dict (summary fields plus html and heading outline), or None"""
+        post = self.by_slug.get(slug)
+        if post is None:
+            return None
+        return dict(post.to_dict(), html=self.html(post), outline=self._outlines.get(post.id, []))
+
+    def tagged(self, tag=None):
+        if tag is None:
+            return self.posts
+        return self.by_tag.get(tag, [])
+
+    def prev(self, slug, tag=None):
+        return self.neighbours.get((tag, slug), (None, None))[0]
+
+    def next(self, slug, tag=None):
+        return self.neighbours.get((tag, slug), (None, None))[1]
+
+    @staticmethod
+    def _listing(posts):
+        ordered = sorted(posts, key=PostSummary.listing_key)
+        return ordered, [post.listing_key() for post in ordered]
+
+    def page(self, tag=None, cursor=None, limit=10):
+        """Up to limit posts published before cursor, newest first, and the cursor for the next page (or None)"""
+        ordered, keys = self._listings.get(tag, ((), ()))
+        end = bisect_left(keys, cursor) if cursor else len(keys)
+        start = max(end - limit, 0)
+        posts = ordered[start:end][::-1]
+        return posts, (keys[start] if start > 0 and posts else None)
+
+    def search(self, query, tag=None, limit=10):
+        """[(summary, score)] for a full-text query, best first"""
+        by_id = self._by_id
+        return [(by_id[post_id], score) for post_id, score in self.search_index.search(query, tag=tag, limit=limit)]
+
+
+EMPTY_STORE = PostStore([])
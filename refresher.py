@@ -0,0 +1,49 @@
+"""Background refresh threads, one per process.
+
+Threads don't survive a fork, so a refresher started before gunicorn
+forks (or never started at all) is started again in each worker the
+first time that worker asks for it.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ERROR_BACKOFF = 30  # Seconds to wait after a step raised
+
+
+class Refresher:
+    """Runs step() forever in a daemon thread, sleeping however many seconds it returns.
+
+        posts_refresher = Refresher('ghost-posts', _refresh_step)
+        posts_refresher.start()  # Safe to call on every request
+    """
+
+    def __init__(self, name, step):
+        self.name = name
+        self.step = step
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the thread for this process unless it is already running"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                delay = self.step()
+            except Exception as e:
+                # Keep refreshing; a dead thread would leave the process serving stale content forever
+                logger.error(f"❌ {self.name} refresh failed: {str(e)}")
+                delay = ERROR_BACKOFF
+            if delay:
+                time.sleep(delay)
@@ -0,0 +1,77 @@
+"""srcset/sizes markup for images built by utils/image_optimizer.py.
+
+The optimizer writes each source in static/images at several widths and
+formats under static/images/responsive/ and records them in
+static/images/responsive/manifest.json. responsive_image() turns a
+manifest entry into a <picture> so browsers download the smallest file
+in the best format they support.
+"""
+import importlib.util
+import json
+import os
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+# Only check that the plugin is installed: importing it loads Pillow, which
+# the web process needs only once /img has something to encode
+AVIF_AVAILABLE = importlib.util.find_spec('pillow_avif') is not None
+
+SOURCE_DIR = 'images'
+RESPONSIVE_DIR = 'images/responsive'
+MANIFEST_NAME = 'manifest.json'
+WIDTHS = (160, 320, 640, 960, 1280, 1920)
+SOURCE_ORDER = ('avif', 'webp')  # Best first: browsers take the first <source> they support
+FORMATS = SOURCE_ORDER if AVIF_AVAILABLE else ('webp',)
+QUALITY = {'avif': 50, 'webp': 80}
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+# App icons are served at exact sizes and never resized
+SKIP_PREFIXES = ('favicon', 'android-chrome', 'apple-touch-icon', 'og-image')
+
+
+def register_avif():
+    """Register the AVIF codec with Pillow, if the plugin is installed; call before encoding"""
+    if AVIF_AVAILABLE:
+        import pillow_avif  # noqa: F401
+
+
+def manifest_path(static_folder):
+    return os.path.join(static_folder, RESPONSIVE_DIR, MANIFEST_NAME)
+
+
+def load_manifest(static_folder):
+    """{'images/x.webp': {'width', 'height', 'variants': {format: [{'width', 'path'}]}}}; empty before a build"""
+    try:
+        with open(manifest_path(static_folder)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _srcset(variants):
+    return ', '.join(f"{url_for('static', filename=v['path'])} {v['width']}w" for v in variants)
+
+
+def init_app(app):
+    """Expose responsive_image(filename, sizes, alt, **attrs) to templates"""
+    manifest = load_manifest(app.static_folder)
+
+    def responsive_image(filename, sizes='100vw', alt='', **attrs):
+        entry = manifest.get(filename)
+        attributes = ''.join(f' {escape(name.rstrip("_"))}="{escape(value)}"' for name, value in attrs.items())
+        if not entry:
+            return Markup(f'<img src="{escape(url_for("static", filename=filename))}" alt="{escape(alt)}"{attributes}>')
+
+        sources = ''.join(
+            f'<source type="image/{fmt}" srcset="{escape(_srcset(entry["variants"][fmt]))}" sizes="{escape(sizes)}">'
+            for fmt in SOURCE_ORDER if entry['variants'].get(fmt)
+        )
+        return Markup(
+            f'<picture>{sources}'
+            f'<img src="{escape(url_for("static", filename=filename))}" alt="{escape(alt)}" '
+            f'width="{entry["width"]}" height="{entry["height"]}"{attributes}>'
+            f'</picture>'
+        )
+
+    app.jinja_env.globals['responsive_image'] = responsive_image
+    return manifest
@@ -0,0 +1,194 @@
+"""Inverted index over post titles, excerpts, tags and HTML bodies.
+
+Built alongside each PostStore, so a query never scans the corpus: each
+query term is a dict lookup (or a bisect over the sorted vocabulary for
+prefixes), and scoring touches only the posts that contain the terms.
+When a sync or webhook changes a few posts, the next store's index
+shares every posting list with the previous one except those of the
+changed posts' terms; replaced posts are tombstoned until enough pile
+up to justify a rebuild.
+
+Memory: each term's postings are one array of 32-bit ints (post number
+in the high half, quantized weight in the low half), and bodies contribute at most
+MAX_BODY_TERMS distinct terms per post. That keeps the index under
+SEARCH_MEMORY_BUDGET per worker for a few hundred posts;
+utils/measure_post_memory.py reports the actual figure.
+"""
+import html
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+FIELD_WEIGHTS = {'title': 5.0, 'tags': 3.0, 'excerpt': 2.0, 'body': 1.0}
+MAX_BODY_TERMS = 1500  # Distinct body terms indexed per post, most frequent first
+MIN_PREFIX = 2  # Shorter query prefixes only match whole terms
+MAX_EXPANSIONS = 16  # Vocabulary terms one prefix may expand to
+PREFIX_PENALTY = 0.7  # A prefix match ranks below the whole word
+MAX_TERM_LENGTH = 32
+SEARCH_MEMORY_BUDGET = 4 * 1024 * 1024
+REBUILD_RATIO = 0.25  # Rebuild once tombstoned posts exceed this share of live ones
+WEIGHT_SCALE = 256  # Weights are stored as fixed point in 16 bits
+MAX_POSTS = 0xFFFF  # Post numbers share the 32-bit posting with the weight
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TAG_RE = re.compile(r'<[^>]+>')
+SKIP_BLOCK_RE = re.compile(r'<(script|style)\b.*?</\1>', re.IGNORECASE | re.DOTALL)
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of',
+    'on', 'or', 'that', 'the', 'this', 'to', 'was', 'we', 'with', 'you', 'your'
+))
+
+
+def strip_html(body):
+    """Visible text of an HTML fragment"""
+    return html.unescape(TAG_RE.sub(' ', SKIP_BLOCK_RE.sub(' ', body or '')))
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower())
+            if token not in STOPWORDS and len(token) <= MAX_TERM_LENGTH]
+
+
+def post_terms(post):
+    """{term: weight} for one raw Ghost post"""
+    weights = {}
+
+    def add(tokens, weight):
+        for token in tokens:
+            weights[token] = weights.get(token, 0.0) + weight
+
+    add(tokenize(post.get('title')), FIELD_WEIGHTS['title'])
+    add(tokenize(' '.join(t.get('name') or t.get('slug') or '' for t in post.get('tags', []))), FIELD_WEIGHTS['tags'])
+    add(tokenize(post.get('excerpt')), FIELD_WEIGHTS['excerpt'])
+
+    for token, count in Counter(tokenize(strip_html(post.get('html')))).most_common(MAX_BODY_TERMS):
+        # Damp repetition so one long post can't dominate every query
+        weights[token] = weights.get(token, 0.0) + FIELD_WEIGHTS['body'] * (1 + math.log(count))
+    return weights
+
+
+def _tags(post):
+    return frozenset(t['slug'] for t in post.get('tags', []) if t.get('slug'))
+
+
+def _pack(number, weight):
+    return (number << 16) | min(int(weight * WEIGHT_SCALE), 0xFFFF)
+
+
+class SearchIndex:
+    """Immutable once built; updated() returns a new index sharing unchanged postings"""
+
+    def __init__(self):
+        self.postings = {}  # term -> array('I') of packed (post number, weight)
+        self.vocabulary = []  # Sorted terms, for prefix lookups
+        self.docs = []  # Post number -> (post id, tag slugs, updated_at, published_at), None once replaced
+        self.numbers = {}  # Live post id -> post number
+        self.dead = 0
+
+    @classmethod
+    def build(cls, posts):
+        index = cls()
+        grouped = {}
+        for post in posts:
+            number = index._add_doc(post)
+            for term, weight in post_terms(post).items():
+                grouped.setdefault(term, []).append(_pack(number, weight))
+        for term, entries in grouped.items():
+            index.postings[term] = array('I', entries)
+        index.vocabulary = sorted(index.postings)
+        return index
+
+    def _add_doc(self, post):
+        number = len(self.docs)
+        self.docs.append((post['id'], _tags(post), post.get('updated_at') or '', post.get('published_at') or ''))
+        self.numbers[post['id']] = number
+        return number
+
+    def updated(self, posts):
+        """Index for the new collection, re-indexing only posts that were added, edited or removed"""
+        current = {post['id'] for post in posts}
+        changed = [post for post in posts if post['id'] not in self.numbers
+                   or self.docs[self.numbers[post['id']]][2] != (post.get('updated_at') or '')]
+        removed = [post_id for post_id in self.numbers if post_id not in current]
+        if not changed and not removed:
+            return self
+        replaced = [post_id for post_id in removed + [post['id'] for post in changed] if post_id in self.numbers]
+        if (self.dead + len(replaced) > REBUILD_RATIO * max(len(current), 1)
+                or len(self.docs) + len(changed) > MAX_POSTS):
+            return SearchIndex.build(posts)
+
+        index = SearchIndex()
+        index.postings = dict(self.postings)
+        index.docs = list(self.docs)
+        index.numbers = dict(self.numbers)
+        index.dead = self.dead
+        for post_id in replaced:
+            # Tombstone; its postings stay behind and are skipped at query time
+            index.docs[index.numbers.pop(post_id)] = None
+            index.dead += 1
+        for post in changed:
+            number = index._add_doc(post)
+            for term, weight in post_terms(post).items():
+                # A new array: the previous index may still be serving queries from the old one
+                index.postings[term] = index.postings.get(term, array('I')) + array('I', (_pack(number, weight),))
+        index.vocabulary = sorted(index.postings)
+        return index
+
+    def expand(self, token, prefix):
+        """[(term, factor)] a query token matches: itself, plus vocabulary terms it prefixes"""
+        matches = [(token, 1.0)] if token in self.postings else []
+        if prefix and len(token) >= MIN_PREFIX:
+            start = bisect_left(self.vocabulary, token)
+            for term in self.vocabulary[start:start + MAX_EXPANSIONS + 1]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    matches.append((term, PREFIX_PENALTY))
+        return matches
+
+    def search(self, query, tag=None, limit=10, prefix=True):
+        """[(post_id, score)] best first; every query term must match. The last term is a prefix for typeahead."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        total = len(self.numbers)
+        docs = self.docs
+        scores = None
+        for i, token in enumerate(tokens):
+            token_scores = {}
+            for term, factor in self.expand(token, prefix and i == len(tokens) - 1):
+                postings = self.postings[term]
+                scale = math.log(1 + total / len(postings)) * factor / WEIGHT_SCALE
+                for packed in postings:
+                    number = packed >> 16
+                    score = (packed & 0xFFFF) * scale
+                    if score > token_scores.get(number, 0.0):
+                        token_scores[number] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {number: score + token_scores[number] for number, score in scores.items()
+                          if number in token_scores}
+            if not scores:
+                return []
+
+        # Replaced posts and other tags drop out here, after the cheap intersection
+        ranked = [(number, score) for number, score in scores.items()
+                  if docs[number] is not None and (not tag or tag in docs[number][1])]
+        # Ties go to the newest post
+        ranked.sort(key=lambda item: (-item[1], _negated(docs[item[0]][3])))
+        return [(docs[number][0], score) for number, score in ranked[:limit]]
+
+    def __len__(self):
+        return len(self.numbers)
+
+
+def _negated(timestamp):
+    """Sort key that orders ISO timestamps newest first"""
+    return tuple(-ord(c) for c in timestamp)
+
+
+EMPTY_INDEX = SearchIndex()
@@ -1,18 +1,45 @@
-from flask import Flask, render_template, send_from_directory, request, redirect, session, url_for, abort, jsonify
-from flask_compress import Compress
-from datetime import datetime, timedelta
+from flask import Flask, Response, render_template, send_from_directory, request, redirect, url_for, abort, jsonify
+from functools import wraps
+import hmac
 import os
-from api_config import get_ghost_posts, get_case_studies, get_ghost_post, get_next_post, get_prev_post, get_ghost_page, get_all_ghost_posts, clear_cache
+from api_config import get_post_store, get_case_studies, get_ghost_post, get_next_post, get_prev_post, get_ghost_page, get_all_ghost_posts, clear_cache, update_post, verify_ghost_signature, seconds_until_forced_refresh, content_version, on_store_change, search_posts, get_posts_page
+from post_store import LISTING_FIELDS, PostSummary, decode_cursor, encode_cursor
+from page_cache import cached_page, page_cache
+from compression import compress_response, send_static_precompressed
+import assets
+import fragments
+import metrics
+import responsive_images
+from image_resize import image_cache, parse_width, resized_image, source_path as image_source_path
+from tts_cache import tts_cache, KEY_PATTERN as TTS_KEY_PATTERN
+from tts import prepare_speech, claim_synthesis, follow_speech, open_speech_stream, close_speech_stream, stream_speech
+try:
+    import bryce_ai
+except ImportError:  # No chat backend deployed: /api/chat answers 503
+    bryce_ai = None
+from assets import is_fingerprinted, IMMUTABLE_MAX_AGE, STATIC_MAX_AGE
+from upstream import fan_out
+from github_contributions import get_github_contributions, contributions_version
 import requests
-from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
 import logging
 from jinja2 import TemplateNotFound
+from werkzeug.exceptions import HTTPException
 
 load_dotenv()
 
 app = Flask(__name__)
-Compress(app)
+# Static files are precompressed at build time (utils/precompress.py) and
+# cached pages when they are rendered; only uncached bodies compress per request
+app.view_functions['static'] = send_static_precompressed
+# url_for('static', ...) emits content-hashed names from utils/fingerprint.py
+assets.init_app(app)
+# responsive_image() in templates emits srcset from utils/image_optimizer.py's manifest
+responsive_images.init_app(app)
+# X-Fragment: 1 renders only the content block for blog.js navigation
+fragments.init_app(app)
+# Server-Timing on every response, and the per-worker counters behind /metrics
+metrics.init_app(app)
 
 # Sample data
 PLAYBOOK = [
@@ -38,125 +65,78 @@ TECH_STACK = [
 ]
 
 # Add this to your configuration
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-GITHUB_USERNAME = 'outsidebryce'
 GHOST_API_URL = "https://bryce-thompson.ghost.io/ghost/api/content/posts/"
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+HOME_DEADLINE = 2  # Longest the home page waits on a cold upstream before rendering without it
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+SEARCH_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_QUERY = 200  # Characters; longer queries are truncated
+POST_API_MAX_AGE = 60  # Browsers and the Fly edge may reuse post JSON this long, then revalidate via ETag
 
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 
-def get_github_contributions(token):
-    # Calculate date range - ensure we get a full year including today
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=364)  # Change from 365 to 364 to include today
-    
-    # Generate list of months for the contribution graph
-    months = []
-    current_date = end_date
-    for _ in range(13):  # 13 months to account for partial months
-        months.append(current_date.strftime('%b'))
-        current_date = current_date.replace(day=1) - timedelta(days=1)  # Go to last day of previous month
-    
-    query = """
-    query($username:String!, $from:DateTime!, $to:DateTime!) {
-      user(login: $username) {
-        contributionsCollection(from: $from, to: $to) {
-          contributionCalendar {
-            totalContributions
-            weeks {
-              contributionDays {
-                contributionCount
-                date
-                weekday
-              }
-            }
-          }
-        }
-      }
-    }
-    """
-    
-    variables = {
-        "username": "outsidebryce",
-        "from": start_date.strftime("%Y-%m-%dT00:00:00"),  # Start at beginning of start date
-        "to": end_date.strftime("%Y-%m-%dT23:59:59")       # End at end of end date
-    }
-    
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    response = requests.post(
-        'https://api.github.com/graphql',
-        json={'query': query, 'variables': variables},
-        headers=headers
-    )
-    
-    if response.status_code == 200:
-        data = response.json()
-        logging.debug(f"Raw GitHub response: {data}")  # Add logging to see raw response
-        
-        calendar = data['data']['user']['contributionsCollection']['contributionCalendar']
-        contributions = {
-            'total': calendar['totalContributions'],
-            'data': {},
-            'dates': {},
-            'months': months  # Add months to the response
-        }
-        
-        # Process the contribution data
-        for week in calendar['weeks']:
-            for day in week['contributionDays']:
-                date = datetime.fromisoformat(day['date'])
-                days_from_end = (end_date - date).days
-                week_number = days_from_end // 7
-                weekday = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'][date.weekday()]
-                key = f"{weekday}-{week_number}"
-                contributions['data'][key] = day['contributionCount']
-                # Add formatted date
-                contributions['dates'][key] = date.strftime("%B %d, %Y")
-        
-        logging.debug(f"Processed contributions: {contributions}")
-        return contributions
-    else:
-        logging.error(f"GitHub API Error: {response.status_code}")
-        return None
+# Rendered pages are keyed by content version; drop old renders as soon as posts change
+on_store_change(lambda store: page_cache.clear())
+
+def home_version():
+    return (content_version(), contributions_version())
+
+def require_admin(view):
+    """Only allow requests carrying "Authorization: Bearer <ADMIN_TOKEN>"; disabled when unset"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return abort(404)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {ADMIN_TOKEN}'):
+            return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
 
 @app.route('/')
+@cached_page(home_version)
 def home():
-    try:
-        # Get all posts in one call, force refresh if requested
-        force_refresh = request.args.get('refresh') == 'true'
-        all_posts = get_all_ghost_posts(force_refresh=force_refresh)
-        
-        # Filter posts by tag and sort by published date
-        news_posts = [p for p in all_posts if any(t.get('slug') == 'news' for t in p.get('tags', []))]
-        news_posts.sort(key=lambda x: x.get('published_at', ''), reverse=True)  # Sort by date, newest first
-        ghost_posts = news_posts[:3]  # Limit to 3 most recent posts
-        
-        playbook_items = [p for p in all_posts if any(t.get('slug') == 'playbook' for t in p.get('tags', []))]
-        tech_stack_items = [p for p in all_posts if any(t.get('slug') == 'tech-stack' for t in p.get('tags', []))]
-        
-        # Get case studies separately since they're from a different source
+    # Ghost posts and GitHub contributions are independent, so wait on both at once;
+    # whichever misses the deadline renders as an unavailable section
+    results, degraded = fan_out({
+        'posts': lambda: get_post_store(timeout=HOME_DEADLINE),
+        'github_contributions': lambda: get_github_contributions(timeout=HOME_DEADLINE)
+    }, timeout=HOME_DEADLINE)
+    
+    store = results['posts']
+    if store is not None:
+        # Home collections are precomputed when the store is built
+        ghost_posts = store.news  # 3 most recent news posts
+        playbook_items = store.playbook
+        tech_stack_items = store.tech_stack
         case_studies = get_case_studies(limit=6)
-        
-    except Exception as e:
-        app.logger.error(f"❌ Error fetching posts: {str(e)}")
+    else:
+        # Posts have never loaded here: say the section is unavailable rather than render it empty
+        degraded.add('posts')
         ghost_posts = []
         case_studies = []
         playbook_items = []
         tech_stack_items = []
     
-    github_contributions = get_github_contributions(GITHUB_TOKEN)
-    
     return render_template('index.html', 
                          current_page='home',
                          ghost_posts=ghost_posts,
                          case_studies=case_studies,
                          playbook_items=playbook_items,
                          tech_stack_items=tech_stack_items,
-                         github_contributions=github_contributions)
+                         github_contributions=results['github_contributions'],
+                         degraded=degraded)
 
-@app.route('/api/refresh-cache')
+@app.route('/api/refresh-cache', methods=['POST'])
+@require_admin
 def refresh_cache():
-    """Force refresh the Ghost posts cache"""
+    """Force refresh the Ghost posts cache (admin only, rate limited across workers)"""
+    retry_after = seconds_until_forced_refresh()
+    if retry_after:
+        response = jsonify({'status': 'error', 'message': 'Cache was refreshed recently'})
+        response.headers['Retry-After'] = str(int(retry_after) + 1)
+        return response, 429
     try:
         clear_cache()
         get_all_ghost_posts(force_refresh=True)
@@ -165,6 +145,26 @@ def refresh_cache():
         app.logger.error(f"Error refreshing cache: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/webhooks/ghost', methods=['POST'])
+def ghost_webhook():
+    """Apply Ghost post.published/edited/unpublished/deleted webhooks to the cached posts"""
+    if not verify_ghost_signature(request.get_data(), request.headers.get('X-Ghost-Signature', '')):
+        return jsonify({'status': 'error', 'message': 'Invalid signature'}), 401
+    
+    payload = request.get_json(silent=True) or {}
+    post = payload.get('post') or {}
+    current = post.get('current') or {}
+    previous = post.get('previous') or {}
+    post_id = current.get('id') or previous.get('id')
+    if not post_id:
+        return jsonify({'status': 'error', 'message': 'No post in payload'}), 400
+    
+    # Deletes send an empty current post; unpublishes send a non-published status
+    removed = not current or current.get('status', 'published') != 'published'
+    if not update_post(post_id, removed=removed):
+        return jsonify({'status': 'error', 'message': 'Failed to update post'}), 502
+    return jsonify({'status': 'success'})
+
 @app.route('/debug/linkedin')
 def debug_linkedin():
     """Debug endpoint to view LinkedIn API response"""
@@ -201,6 +201,7 @@ def dribbble_callback():
     return "Authentication failed"
 
 @app.route('/case-studies/<slug>')
+@cached_page(content_version)
 def case_study_post(slug):
     """Handle direct case study post URLs"""
     post = get_ghost_post(slug)
@@ -212,40 +213,70 @@ def case_study_post(slug):
                          next_post=get_next_post(post, tag='case-studies'),
                          prev_post=get_prev_post(post, tag='case-studies'))
 
+def post_link(summary):
+    """Neighbour link for the overlay's prev/next buttons"""
+    return summary.to_dict() if summary else None
+
+def post_json_response(post, tag=None):
+    """JSON payload for the post overlay"""
+    return jsonify({
+        'title': post['title'],
+        'html': post['html'],
+        'outline': post.get('outline', []),
+        'feature_image': post.get('feature_image'),
+        'reading_time': post.get('reading_time', 0),
+        'published_at': post.get('published_at', ''),
+        'next_post': post_link(get_next_post(post, tag=tag)),
+        'prev_post': post_link(get_prev_post(post, tag=tag))
+    })
+
 @app.route('/api/case-studies/<slug>')
+@cached_page(content_version, max_age=POST_API_MAX_AGE)
 def get_case_study_content(slug):
     """API endpoint for fetching case study content"""
+    post = get_ghost_post(slug)
+    if not post:
+        return abort(404)
+    
     try:
-        force_refresh = request.args.get('refresh') == 'true'
-        post = get_ghost_post(slug) if not force_refresh else get_ghost_post(slug, force_refresh=True)
-        if not post:
-            return abort(404)
-        
-        response_data = {
-            'title': post['title'],
-            'html': post['html'],
-            'feature_image': post.get('feature_image'),
-            'reading_time': post.get('reading_time', 0),
-            'published_at': post.get('published_at', ''),
-            'next_post': get_next_post(post, tag='case-studies'),
-            'prev_post': get_prev_post(post, tag='case-studies')
-        }
-        
-        response = jsonify(response_data)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
-        
+        return post_json_response(post, tag='case-studies')
     except Exception as e:
         app.logger.error(f"Error processing case study: {e}")
         return abort(500)
 
 @app.route('/blog')
+@cached_page(content_version, query_args=('cursor',))
 def blog():
-    return render_template('blog.html', current_page='blog')
+    """First page of posts; ?cursor=<next_cursor> serves the older pages linked at the bottom"""
+    cursor = request.args.get('cursor')
+    cursor_key = decode_cursor(cursor) if cursor else None
+    if cursor and cursor_key is None:
+        abort(400)
+    posts, next_key = get_posts_page(cursor=cursor_key, limit=PAGE_SIZE)
+    return render_template('blog.html', current_page='blog', posts=posts,
+                           next_cursor=encode_cursor(next_key) if next_key else None)
+
+@app.route('/api/posts')
+@cached_page(content_version, max_age=POST_API_MAX_AGE, query_args=('tag', 'cursor', 'limit', 'fields'))
+def list_posts():
+    """Post cards, newest first: ?tag=<slug>&cursor=<next_cursor>&limit=<n>&fields=title,slug,..."""
+    cursor = request.args.get('cursor')
+    cursor_key = decode_cursor(cursor) if cursor else None
+    if cursor and cursor_key is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    fields = tuple(f for f in request.args.get('fields', '').split(',') if f) or LISTING_FIELDS
+    if not set(fields) <= set(PostSummary.__slots__):
+        return jsonify({'error': f"fields must be among {', '.join(PostSummary.__slots__)}"}), 400
+    limit = min(max(request.args.get('limit', PAGE_SIZE, type=int) or PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    
+    posts, next_key = get_posts_page(tag=request.args.get('tag') or None, cursor=cursor_key, limit=limit)
+    return jsonify({
+        'posts': [post.to_dict(fields) for post in posts],
+        'next_cursor': encode_cursor(next_key) if next_key else None
+    })
 
 @app.route('/blog/<slug>')
+@cached_page(content_version)
 def blog_post(slug):
     """Handle direct blog post URLs - SEO friendly"""
     post = get_ghost_post(slug)
@@ -254,127 +285,182 @@ def blog_post(slug):
     return render_template('blog_post.html', current_page='blog', post=post)
 
 @app.route('/api/posts/<slug>')
+@cached_page(content_version, max_age=POST_API_MAX_AGE)
 def get_post_content(slug):
     """API endpoint for fetching post content"""
+    post = get_ghost_post(slug)
+    if not post:
+        return abort(404)
+    
     try:
-        force_refresh = request.args.get('refresh') == 'true'
-        post = get_ghost_post(slug) if not force_refresh else get_ghost_post(slug, force_refresh=True)
-        if not post:
-            return abort(404)
-        
-        response_data = {
-            'title': post['title'],
-            'html': post['html'],
-            'feature_image': post.get('feature_image'),
-            'reading_time': post.get('reading_time', 0),
-            'published_at': post.get('published_at', ''),
-            'next_post': get_next_post(post),
-            'prev_post': get_prev_post(post)
-        }
-        
-        response = jsonify(response_data)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
-        
+        return post_json_response(post)
     except Exception as e:
         app.logger.error(f"Error processing post: {e}")
         return abort(500)
 
+@app.route('/api/search')
+def search():
+    """Full-text search over posts: ?q=<query>[&tag=<slug>][&limit=<n>]; the last word matches as a prefix"""
+    query = request.args.get('q', '').strip()[:SEARCH_MAX_QUERY]
+    limit = min(max(request.args.get('limit', SEARCH_LIMIT, type=int) or SEARCH_LIMIT, 1), SEARCH_MAX_LIMIT)
+    results = search_posts(query, tag=request.args.get('tag') or None, limit=limit) if query else []
+    response = jsonify({
+        'query': query,
+        'results': [dict(summary.to_dict(), score=round(score, 3)) for summary, score in results]
+    })
+    response.cache_control.public = True
+    response.cache_control.max_age = POST_API_MAX_AGE
+    return compress_response(response)
+
 @app.route('/api/chat', methods=['POST'])
-async def chat():
+def chat():
     try:
-        data = request.json
-        message = data.get('message')
+        data = request.get_json(silent=True) or {}
+        message = (data.get('message') or '').strip()
+        if not message:
+            return jsonify({'error': 'message is required'}), 400
+        if bryce_ai is None:
+            return jsonify({'error': 'Chat is not configured'}), 503
         
         # Get AI response using BryceAI
-        ai_response = await bryce_ai.get_response(message)
+        ai_response = bryce_ai.get_response(message)
+        if not ai_response:
+            return jsonify({'error': 'The chat service is unavailable'}), 502
         
-        # Use environment variable for Voice ID
-        VOICE_ID = os.getenv('ELEVEN_LABS_VOICE_ID')
-        
-        tts_response = requests.post(
-            f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}",
-            headers={
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": os.getenv('ELEVEN_LABS_API_KEY')
-            },
-            json={
-                "text": ai_response,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.5
-                }
-            }
-        )
-        
-        if tts_response.status_code != 200:
-            raise Exception(f"TTS API request failed: {tts_response.text}")
-            
-        # Add rate limiting and cleanup
-        current_time = datetime.now()
-        audio_filename = f"audio_{current_time.timestamp()}.mp3"
-        audio_path = os.path.join(app.static_folder, 'audio', audio_filename)
-        
-        # Cleanup old audio files (keep last 24 hours)
-        cleanup_old_audio_files()
-        
-        with open(audio_path, 'wb') as f:
-            f.write(tts_response.content)
+        # Answer with the text now; the audio is synthesized while the browser streams audioUrl
+        key = prepare_speech(ai_response)
             
         return jsonify({
             'text': ai_response,
-            'audioUrl': url_for('static', filename=f'audio/{audio_filename}')
+            'audioUrl': url_for('cached_audio', key=key)
         })
         
     except Exception as e:
         app.logger.error(f"Chat error: {str(e)}")
         return jsonify({'error': 'An error occurred processing your request'}), 500
 
-def cleanup_old_audio_files():
-    """Remove audio files older than 24 hours"""
-    audio_dir = os.path.join(app.static_folder, 'audio')
-    current_time = datetime.now()
-    
-    for filename in os.listdir(audio_dir):
-        if not filename.endswith('.mp3'):
-            continue
-            
-        file_path = os.path.join(audio_dir, filename)
-        file_time = datetime.fromtimestamp(os.path.getctime(file_path))
-        
-        if current_time - file_time > timedelta(hours=24):
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                app.logger.error(f"Error removing old audio file {filename}: {str(e)}")
+def _cached_audio_file(key):
+    response = send_from_directory(tts_cache.directory, f'{key}.mp3', mimetype='audio/mpeg')
+    # The name is a hash of the audio's inputs, so its content never changes
+    response.cache_control.public = True
+    response.cache_control.no_cache = None
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/audio/<key>.mp3')
+def cached_audio(key):
+    """Serve synthesized speech from the TTS cache, streaming it from ElevenLabs on first request"""
+    if not TTS_KEY_PATTERN.match(key):
+        return abort(404)
+    if os.path.isfile(tts_cache.path(key)):
+        return _cached_audio_file(key)
+
+    text = tts_cache.pending_text(key)
+    if text is None:
+        return abort(404)
+    synthesis = claim_synthesis(key)
+    if synthesis is None:
+        # Another request, maybe in another worker, is synthesizing it: relay its audio as it is written
+        response = Response(follow_speech(key), mimetype='audio/mpeg')
+        response.cache_control.no_store = True
+        return response
+    if os.path.isfile(tts_cache.path(key)):
+        # Finished by the previous holder between the check above and the claim
+        synthesis.release()
+        return _cached_audio_file(key)
+    try:
+        stream = open_speech_stream(text)
+    except requests.RequestException as e:
+        synthesis.release()
+        app.logger.error(f"TTS stream error: {str(e)}")
+        return jsonify({'error': 'Speech synthesis failed'}), 502
+    if stream is None:
+        synthesis.release()
+        return jsonify({'error': 'Speech synthesis is busy'}), 503, {'Retry-After': '5'}
+
+    # Chunked response: each chunk goes out as ElevenLabs produces it
+    response = Response(stream_speech(key, stream), mimetype='audio/mpeg')
+    response.call_on_close(lambda: close_speech_stream(stream, synthesis))
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/img/<path:filename>')
+def resize_image(filename):
+    """static/images/<filename> at ?w=<width>, in the best format the client accepts"""
+    width = parse_width(request.args.get('w'))
+    if width is None:
+        return jsonify({'error': 'Unsupported width'}), 400
+    path = image_source_path(app.static_folder, filename)
+    if path is None:
+        return abort(404)
+    try:
+        cached_path, mimetype = resized_image(path, width, request.headers.get('Accept'))
+    except TimeoutError:
+        return jsonify({'error': 'Image is still being resized'}), 503, {'Retry-After': '1'}
+    response = send_from_directory(image_cache.directory, os.path.basename(cached_path), mimetype=mimetype)
+    response.vary.add('Accept')
+    response.cache_control.public = True
+    response.cache_control.no_cache = None
+    response.cache_control.max_age = STATIC_MAX_AGE
+    return response
+
+@app.route('/api/img/stats')
+def image_stats():
+    """Resized image cache hit/miss counts and disk usage, across all workers"""
+    return jsonify(image_cache.stats())
+
+@app.route('/api/tts/stats')
+def tts_stats():
+    """TTS cache hit/miss counts and disk usage, across all workers"""
+    return jsonify(tts_cache.stats())
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: always 200, with 'warming' in the body until posts are loaded in this worker.
+
+    Never 503: pages render (with sections marked unavailable) while Ghost is
+    down, so a failing Ghost must not take the machine out of rotation.
+    """
+    version = content_version()
+    response = jsonify({'status': 'ok' if version else 'warming', 'version': version})
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text format, summed over every worker"""
+    response = Response(metrics.render_prometheus(*metrics.collect()), mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.cache_control.no_store = True
+    return compress_response(response)
 
 @app.after_request
 def add_cache_headers(response):
     """Add cache headers to static assets"""
-    if request.path.startswith('/static/'):
-        # Cache static files for 30 days
-        response.cache_control.max_age = 2592000
+    if request.endpoint == 'static':
+        filename = (request.view_args or {}).get('filename', '')
         response.cache_control.public = True
-        response.headers['Vary'] = 'Accept-Encoding'
-        
-        # Add expires header
-        expires = datetime.now() + timedelta(seconds=2592000)
-        response.headers['Expires'] = expires.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        response.cache_control.no_cache = None
+        if is_fingerprinted(filename):
+            # Hashed names change whenever the content does, so never revalidate
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.max_age = STATIC_MAX_AGE
     return response
 
 @app.route('/ai-chat')
+@cached_page(content_version)
 def ai_chat():
     return render_template('ai-chat.html')
 
 @app.route('/<path>')
+@cached_page(content_version)
 def dynamic_page(path):
     """Handle dynamic routing for pages like blog, about, contact"""
     try:
-        # First try to get page as a Ghost page
+        # First try to get page as a Ghost page; slugs missing from the synced index 404 without I/O
         page = get_ghost_page(path)
         if page:
             return render_template('page.html', 
@@ -385,9 +471,10 @@ def dynamic_page(path):
         if path in ['blog', 'about', 'contact']:
             # For blog, fetch posts
             if path == 'blog':
-                ghost_posts = get_ghost_posts(limit=10)
+                ghost_posts, next_key = get_posts_page(limit=PAGE_SIZE)
                 return render_template('blog.html', 
                                     posts=ghost_posts, 
+                                    next_cursor=encode_cursor(next_key) if next_key else None,
                                     current_page='blog')
             
             # For about and contact, use static templates
@@ -400,6 +487,8 @@ def dynamic_page(path):
         # If path doesn't match any content, 404
         return abort(404)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error loading page {path}: {e}")
         return abort(500)
@@ -0,0 +1,66 @@
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; everyone who arrives while
+    it is running waits for, and shares, that one result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn, timeout=None):
+        """Run fn once per key at a time; followers raise TimeoutError after timeout seconds"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def do_background(self, key, fn):
+        """Start fn in a daemon thread unless a call for key is already running"""
+        if self.in_flight(key):
+            return False
+
+        def run():
+            try:
+                self.do(key, fn)
+            except Exception:
+                pass  # fn is expected to log its own failures
+
+        threading.Thread(target=run, name=f'singleflight-{key}', daemon=True).start()
+        return True
@@ -0,0 +1,146 @@
+"""On-disk snapshots shared by every worker process.
+
+One worker at a time wins the refresh lock and writes a new snapshot; the
+others notice the file changed and load it instead of calling upstream
+themselves. Snapshots outlive the process, so a cold start can serve the
+last good content straight away.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: every process refreshes for itself
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+POSTS_SNAPSHOT = os.path.join(CACHE_DIR, 'ghost_posts.json')
+# Written instead of the snapshot when a sync finds nothing new, so workers
+# learn the posts are fresh without re-reading the whole archive
+POSTS_CHECKED = os.path.join(CACHE_DIR, 'ghost_posts.checked.json')
+
+
+def read_json(path):
+    """Read a JSON file, returning None if it is missing or corrupt"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_atomic(path, payload):
+    """Write JSON via a temp file and rename, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def content_version(posts, pages=None):
+    """Stable short hash of a post collection and page index; unchanged content keeps its version"""
+    digest = hashlib.sha1(json.dumps([posts, pages], sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_posts_snapshot():
+    """Load the shared posts snapshot: {'version', 'fetched_at', 'full_synced_at', 'posts', 'pages', 'unsized'} or None"""
+    snapshot = read_json(POSTS_SNAPSHOT)
+    if not isinstance(snapshot, dict) or 'posts' not in snapshot:
+        return None
+    return snapshot
+
+
+def write_posts_snapshot(posts, fetched_at, full_synced_at, version=None, pages=None, unsized=None):
+    """Publish a new posts snapshot (and page slug index, {slug: updated_at}) for every worker.
+
+    unsized lists post images whose dimensions still have to be read.
+    """
+    snapshot = {
+        'version': version or content_version(posts, pages),
+        'fetched_at': fetched_at,
+        'full_synced_at': full_synced_at,
+        'posts': posts,
+        'pages': pages,
+        'unsized': unsized or []
+    }
+    try:
+        write_json_atomic(POSTS_SNAPSHOT, snapshot)
+    except OSError as e:
+        logger.error(f"❌ Error writing posts snapshot: {str(e)}")
+    return snapshot
+
+
+def read_posts_checked():
+    """{'version', 'fetched_at'} of the last sync that found nothing new, or None"""
+    checked = read_json(POSTS_CHECKED)
+    if not isinstance(checked, dict) or 'fetched_at' not in checked:
+        return None
+    return checked
+
+
+def write_posts_checked(version, fetched_at):
+    """Record that the snapshot with this version was still current at fetched_at"""
+    try:
+        write_json_atomic(POSTS_CHECKED, {'version': version, 'fetched_at': fetched_at})
+    except OSError as e:
+        logger.error(f"❌ Error writing posts check: {str(e)}")
+
+
+class RefreshLock:
+    """Cross-process lock electing which worker talks to upstream.
+
+    Non-blocking by default; pass blocking=True for writes that must not be
+    dropped, such as webhook updates.
+
+        with RefreshLock('posts') as lock:
+            if lock.acquired:
+                ...
+    """
+
+    def __init__(self, name, blocking=False):
+        self.path = os.path.join(CACHE_DIR, f'{name}.lock')
+        self.blocking = blocking
+        self.acquired = False
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            self.acquired = True
+            return self
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX if self.blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.acquired = True
+        except OSError:
+            self.acquired = False
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            if self.acquired:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        return False
@@ -60,6 +60,13 @@ class AIChatUI {
                 audioUrl: data.audioUrl
             });
 
+            // The audio URL streams as it is synthesized, so start playing right away
+            if (data.audioUrl) {
+                this.playAudio(data.audioUrl).catch((error) => {
+                    console.warn('Autoplay blocked:', error);
+                });
+            }
+
         } catch (error) {
             console.error('Error:', error);
             typingIndicator.remove();
@@ -124,13 +131,14 @@ class AIChatUI {
             this.currentAudio = null;
         }
 
+        // play() resolves once the first chunks have buffered, not after the whole file
         const audio = new Audio(audioUrl);
+        audio.preload = 'auto';
         this.currentAudio = audio;
-        await audio.play();
-
         audio.addEventListener('ended', () => {
             this.currentAudio = null;
         });
+        await audio.play();
     }
 }
 
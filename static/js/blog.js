@@ -35,13 +35,13 @@ document.addEventListener('DOMContentLoaded', function() {
             
             // Try case-studies endpoint
             if (type === 'case-studies') {
-                response = await fetch(`/api/case-studies/${slug}?refresh=true`);
+                response = await fetch(`/api/case-studies/${slug}`);
                 if (!response.ok) {
                     console.log('Case studies endpoint failed, trying posts endpoint...');
-                    response = await fetch(`/api/posts/${slug}?refresh=true`);
+                    response = await fetch(`/api/posts/${slug}`);
                 }
             } else {
-                response = await fetch(`/api/posts/${slug}?refresh=true`);
+                response = await fetch(`/api/posts/${slug}`);
             }
 
             if (!response.ok) {
@@ -264,29 +264,22 @@ document.addEventListener('DOMContentLoaded', function() {
             // Close mobile menu first
             closeMobileMenu();
 
-            const response = await fetch(path);
+            // Ask for just the content block; the header is cloned from this page below
+            const response = await fetch(path, { headers: { 'X-Fragment': '1' } });
             if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
             const htmlText = await response.text();
             
-            // Create a temporary container to parse the HTML
-            const parser = new DOMParser();
-            const doc = parser.parseFromString(htmlText, 'text/html');
-            
             // Clear the dynamic content container
             dynamicContent.innerHTML = '';
             
-            // Get the content after the header from the loaded page
-            const header = doc.querySelector('header');
             let content = document.createElement('div');
+            content.innerHTML = htmlText;
             
-            if (header) {
-                let currentElement = header.nextElementSibling;
-                while (currentElement) {
-                    content.appendChild(currentElement.cloneNode(true));
-                    currentElement = currentElement.nextElementSibling;
-                }
-            } else {
-                content.innerHTML = doc.body.innerHTML;
+            // Fragments lead with their <title>; adopt it and drop the element
+            const fragmentTitle = content.querySelector('title');
+            if (fragmentTitle) {
+                document.title = fragmentTitle.textContent;
+                fragmentTitle.remove();
             }
 
             // Get the existing header from the current page and clone it
@@ -386,8 +379,79 @@ document.addEventListener('DOMContentLoaded', function() {
                 overlayId: 'dynamic-menuOverlay'
             });
         }
+
+        // Scripts inside innerHTML never run, so the blog list is wired up from here
+        initializePostList(dynamicContent);
+    }
+
+    // Infinite scroll: fetch the next page of cards (a few KB) as the end of the list comes into view.
+    // Without JS (or IntersectionObserver) the "Older posts" link pages through ?cursor= instead.
+    function initializePostList(root = document) {
+        const list = root.querySelector('#post-list');
+        const sentinel = root.querySelector('#post-list-sentinel');
+        const more = root.querySelector('#post-list-more');
+        if (!list || !sentinel || list.dataset.scrollReady || !list.dataset.nextCursor || !('IntersectionObserver' in window)) return;
+        list.dataset.scrollReady = 'true';
+        if (more) more.classList.add('hidden');
+
+        let loading = false;
+        const fields = 'title,slug,excerpt,reading_time,published_at';
+
+        const card = (post) => {
+            const article = document.createElement('article');
+            article.className = 'bg-white dark:bg-[#141414] rounded-lg shadow-sm p-6';
+            const heading = document.createElement('h2');
+            heading.className = 'text-2xl mb-2';
+            const link = document.createElement('a');
+            link.href = `/blog/${post.slug}`;
+            link.className = 'hover:text-blue-600 dark:hover:text-blue-400';
+            link.textContent = post.title;
+            heading.appendChild(link);
+            const meta = document.createElement('div');
+            meta.className = 'text-gray-600 dark:text-gray-400 mb-4';
+            meta.textContent = `${post.reading_time} min read • ${(post.published_at || '').split('T')[0]}`;
+            article.append(heading, meta);
+            if (post.excerpt) {
+                const excerpt = document.createElement('p');
+                excerpt.className = 'text-gray-700 dark:text-gray-300';
+                excerpt.textContent = post.excerpt;
+                article.appendChild(excerpt);
+            }
+            return article;
+        };
+
+        const stop = () => {
+            observer.disconnect();
+            // Fall back to the link for whatever is left
+            if (more && list.dataset.nextCursor) {
+                more.href = `/blog?cursor=${encodeURIComponent(list.dataset.nextCursor)}`;
+                more.classList.remove('hidden');
+            }
+        };
+
+        const observer = new IntersectionObserver(async (entries) => {
+            if (!entries.some((entry) => entry.isIntersecting) || loading || !list.dataset.nextCursor) return;
+            loading = true;
+            try {
+                const params = new URLSearchParams({ cursor: list.dataset.nextCursor, fields });
+                const response = await fetch(`/api/posts?${params}`);
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const data = await response.json();
+                data.posts.forEach((post) => list.appendChild(card(post)));
+                list.dataset.nextCursor = data.next_cursor || '';
+                if (!data.next_cursor) stop();
+            } catch (error) {
+                console.error('Error loading posts:', error);
+                stop();
+            } finally {
+                loading = false;
+            }
+        }, { rootMargin: '400px' });
+        observer.observe(sentinel);
     }
 
+    initializePostList();
+
     // Initialize header components
     function initializeHeaderComponents(headerElement = document, options = {}) {
         const { menuId = 'mobile-menu', overlayId = 'menuOverlay' } = options;
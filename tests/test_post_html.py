@@ -0,0 +1,124 @@
+"""Sync-time rewriting of Ghost post HTML."""
+import pytest
+
+import post_html
+from post_html import IMAGE_SIZES, prepare_posts, process_html
+
+IMAGE = 'https://blog.example.com/content/images/2024/01/photo.jpg'
+RESIZED = 'https://blog.example.com/content/images/size/w1000/2024/01/photo.jpg'
+
+
+@pytest.fixture(autouse=True)
+def ghost_site(tmp_path, monkeypatch):
+    """Our Ghost site is blog.example.com, and no image sizes are known yet"""
+    monkeypatch.setenv('GHOST_URL', 'https://blog.example.com')
+    monkeypatch.setattr(post_html, 'IMAGE_SIZES_FILE', str(tmp_path / 'image_sizes.json'))
+    monkeypatch.setattr(post_html, '_known_sizes', {})
+    monkeypatch.setattr(post_html, '_known_sizes_mtime', None)
+
+
+def image_attrs(src, sizes):
+    html, _, unsized = process_html(f'<img src="{src}" alt="Photo">', sizes=sizes)
+    return html, unsized
+
+
+def test_heading_ids_are_unique_and_outlined():
+    html, outline, _ = process_html(
+        '<h2>Getting started</h2><h3>Setup &amp; install</h3>'
+        '<h2>Getting started</h2><h2 id="custom">Kept</h2><h4>Not outlined</h4>',
+        sizes={}
+    )
+
+    assert '<h2 id="getting-started">' in html
+    assert '<h3 id="setup-install">Setup &amp; install</h3>' in html
+    assert '<h2 id="getting-started-2">' in html
+    assert '<h2 id="custom">Kept</h2>' in html
+    assert outline == [
+        {'level': 2, 'id': 'getting-started', 'text': 'Getting started'},
+        {'level': 3, 'id': 'setup-install', 'text': 'Setup & install'},
+        {'level': 2, 'id': 'getting-started-2', 'text': 'Getting started'},
+        {'level': 2, 'id': 'custom', 'text': 'Kept'},
+    ]
+
+
+def test_whitespace_collapses_but_separates_inline_tags():
+    html, _, _ = process_html(
+        '<div>\n  <p>Hello   <strong>bold</strong>  world\n and <a href="/x">a link</a>.</p>\n'
+        '  <!--kg-card-begin: markdown-->  </div>',
+        sizes={}
+    )
+
+    assert html == '<div><p>Hello <strong>bold</strong> world and <a href="/x">a link</a>.</p></div>'
+
+
+def test_preformatted_content_is_untouched():
+    body = ('<pre>  indented\n    code  <!-- kept --></pre>'
+            '<script>if (a  <  b) {\n  go();\n}</script>'
+            '<textarea>  line one\n  line two</textarea>')
+    html, _, _ = process_html(body, sizes={})
+
+    assert '<pre>  indented\n    code  <!-- kept --></pre>' in html
+    assert '<script>if (a  <  b) {\n  go();\n}</script>' in html
+    assert '<textarea>  line one\n  line two</textarea>' in html
+
+
+def test_ghost_image_with_known_size():
+    html, unsized = image_attrs(IMAGE, sizes={IMAGE: [1200, 800]})
+
+    assert 'width="1200" height="800"' in html
+    # Never wider than the original: 600w and 1000w from the resizer, then the original itself
+    assert (f'srcset="{IMAGE.replace("/images/", "/images/size/w600/")} 600w, '
+            f'{IMAGE.replace("/images/", "/images/size/w1000/")} 1000w, {IMAGE} 1200w"') in html
+    assert f'sizes="{IMAGE_SIZES}"' in html
+    assert 'loading="lazy"' in html and 'decoding="async"' in html
+    assert unsized == []
+
+
+def test_ghost_image_without_known_size_is_reported():
+    html, unsized = image_attrs(RESIZED, sizes={})
+
+    assert 'width=' not in html and 'height=' not in html
+    assert ' 2000w"' in html
+    assert 'loading="lazy"' in html
+    # Sizes are keyed by the original, whichever resized copy the post used
+    assert unsized == [IMAGE]
+
+
+def test_unreadable_and_external_images():
+    html, unsized = image_attrs(IMAGE, sizes={IMAGE: None})
+    assert 'width=' not in html and 'srcset=' in html
+    assert unsized == []
+
+    html, _, unsized = process_html('<img src="https://cdn.example.org/x.png" loading="eager">', sizes={})
+    assert html == '<img src="https://cdn.example.org/x.png" loading="eager" decoding="async">'
+    assert unsized == []
+
+
+def test_processed_posts_are_reused_until_the_pipeline_changes(monkeypatch):
+    posts = [{'id': '1', 'slug': 'one', 'updated_at': '2024-01-01', 'html': '<h2>Intro</h2>'}]
+
+    prepared, processed, _ = prepare_posts(posts)
+    assert processed == 1
+    assert prepared[0]['processed_version'] == post_html.PIPELINE_VERSION
+
+    # Already processed, either in place or in the previous snapshot
+    assert prepare_posts(prepared)[1] == 0
+    assert prepare_posts(posts, previous=prepared)[1] == 0
+
+    monkeypatch.setattr(post_html, 'PIPELINE_VERSION', post_html.PIPELINE_VERSION + 1)
+    reprocessed, processed, _ = prepare_posts(prepared, previous=prepared)
+    assert processed == 1
+    assert reprocessed[0]['processed_version'] == post_html.PIPELINE_VERSION
+
+
+def test_posts_with_unsized_images_are_processed_again():
+    posts = [{'id': '1', 'slug': 'one', 'updated_at': '2024-01-01', 'html': f'<img src="{IMAGE}">'}]
+
+    prepared, processed, unsized = prepare_posts(posts)
+    assert (processed, unsized) == (1, [IMAGE])
+    assert prepared[0]['processed_version'] is None
+
+    post_html.write_json_atomic(post_html.IMAGE_SIZES_FILE, {IMAGE: [800, 600]})
+    prepared, processed, unsized = prepare_posts(prepared, previous=prepared)
+    assert (processed, unsized) == (1, [])
+    assert 'width="800" height="600"' in prepared[0]['html_processed']
@@ -0,0 +1,125 @@
+"""Cursor-paginated post listings: PostStore.page, /api/posts and /blog."""
+import base64
+import time
+
+import pytest
+
+import api_config
+from page_cache import page_cache
+from post_store import PostStore, decode_cursor, encode_cursor
+
+POSTS = [
+    {'id': f'{i:024x}', 'slug': f'post-{i}', 'title': f'Post {i}', 'excerpt': f'Excerpt {i}', 'html': '',
+     'reading_time': 3, 'published_at': f'2024-01-{i:02d}T00:00:00.000Z',
+     'updated_at': f'2024-01-{i:02d}T00:00:00.000Z', 'tags': [{'slug': 'news'}] if i % 2 == 0 else []}
+    for i in range(1, 26)
+]
+NEWEST_FIRST = [f'post-{i}' for i in range(25, 0, -1)]
+
+
+@pytest.fixture
+def store():
+    return PostStore(POSTS, version='listing-test')
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    """The app with store loaded, and no refresher talking to Ghost"""
+    import server
+
+    monkeypatch.setattr(api_config, 'start_refresher', lambda: None)
+    monkeypatch.setattr(api_config, '_store', store)
+    monkeypatch.setattr(api_config, '_store_fetched_at', time.time())
+    page_cache.clear()
+    return server.app.test_client()
+
+
+def walk(store, tag=None, limit=10):
+    """Every page of a listing, following next cursors through their encoded form"""
+    pages = []
+    cursor = None
+    while True:
+        posts, next_key = store.page(tag=tag, cursor=cursor, limit=limit)
+        pages.append([post.slug for post in posts])
+        if next_key is None:
+            return pages
+        cursor = decode_cursor(encode_cursor(next_key))
+
+
+def test_cursor_round_trip():
+    key = ('2024-01-05T00:00:00.000Z', '0000000000000000000000ab')
+    cursor = encode_cursor(key)
+
+    assert '=' not in cursor and '/' not in cursor and '+' not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize('cursor', [
+    '!!!',
+    'not base64',
+    base64.urlsafe_b64encode(b'no separator').decode(),
+    base64.urlsafe_b64encode(b'\xff\xfe|id').decode(),
+])
+def test_invalid_cursors_decode_to_none(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_pages_cover_every_post_once(store):
+    pages = walk(store, limit=10)
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == NEWEST_FIRST
+
+
+def test_tag_pages(store):
+    pages = walk(store, tag='news', limit=5)
+
+    assert sum(pages, []) == [slug for slug in NEWEST_FIRST if int(slug.split('-')[1]) % 2 == 0]
+    posts, next_key = store.page(tag='missing')
+    assert not posts and next_key is None
+
+
+def test_cursor_survives_its_post_being_removed(store):
+    _, next_key = store.page(limit=10)
+    # The cursor is post-16, the last post shown; a sync drops it before the reader scrolls
+    smaller = PostStore([post for post in POSTS if post['slug'] != 'post-16'])
+
+    posts, _ = smaller.page(cursor=next_key, limit=3)
+    assert [post.slug for post in posts] == ['post-15', 'post-14', 'post-13']
+
+
+def test_api_pages_follow_next_cursor(client):
+    slugs = []
+    url = '/api/posts?limit=10&fields=slug'
+    while url:
+        data = client.get(url).get_json()
+        assert all(set(post) == {'slug'} for post in data['posts'])
+        slugs.extend(post['slug'] for post in data['posts'])
+        url = f"/api/posts?limit=10&fields=slug&cursor={data['next_cursor']}" if data['next_cursor'] else None
+
+    assert slugs == NEWEST_FIRST
+
+
+def test_api_limit_and_tag(client):
+    assert len(client.get('/api/posts?limit=-1').get_json()['posts']) == 1
+    assert len(client.get('/api/posts?limit=1000').get_json()['posts']) == 25
+    data = client.get('/api/posts?tag=news&limit=3&fields=slug').get_json()
+    assert [post['slug'] for post in data['posts']] == ['post-24', 'post-22', 'post-20']
+
+
+@pytest.mark.parametrize('query', ['cursor=!!!', 'cursor=bm8gc2VwYXJhdG9y', 'fields=slug,html', 'fields=password'])
+def test_api_rejects_bad_cursors_and_fields(client, query):
+    response = client.get(f'/api/posts?{query}')
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_blog_pages_by_cursor(client):
+    first = client.get('/blog').get_data(as_text=True)
+    next_cursor = encode_cursor(PostStore(POSTS).page(limit=10)[1])
+    assert f'href="/blog?cursor={next_cursor}"' in first
+
+    older = client.get(f'/blog?cursor={next_cursor}').get_data(as_text=True)
+    assert '/blog/post-15"' in older and '/blog/post-16"' not in older
+    assert client.get('/blog?cursor=!!!').status_code == 400
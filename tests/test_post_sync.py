@@ -0,0 +1,69 @@
+"""Incremental Ghost syncs against a stubbed Content API."""
+import copy
+
+import pytest
+
+import api_config
+import snapshot
+
+POSTS = [
+    {'id': f'{i:024x}', 'slug': f'post-{i}', 'title': f'Post {i}', 'html': f'<p>Post {i}</p>',
+     'published_at': f'2024-01-0{i}T00:00:00.000Z', 'updated_at': f'2024-01-0{i}T01:00:00.000Z', 'tags': []}
+    for i in range(1, 4)
+]
+
+
+@pytest.fixture
+def ghost(tmp_path, monkeypatch):
+    """Point the snapshot at tmp_path and serve POSTS (or the test's edits) as Ghost would"""
+    for module in (api_config, snapshot):
+        monkeypatch.setattr(module, 'POSTS_SNAPSHOT', str(tmp_path / 'ghost_posts.json'))
+        monkeypatch.setattr(module, 'POSTS_CHECKED', str(tmp_path / 'ghost_posts.checked.json'))
+    for name, value in (('_store', None), ('_store_fetched_at', 0), ('_full_synced_at', 0),
+                        ('_snapshot_mtime', None), ('_checked_mtime', None), ('_page_index', None)):
+        monkeypatch.setattr(api_config, name, value)
+
+    posts = copy.deepcopy(POSTS)
+
+    def fetch_ghost_posts(updated_since=None, deadline=None):
+        # Like Ghost's updated_at:>= filter, the newest post always comes back
+        return [copy.deepcopy(post) for post in posts
+                if updated_since is None or post['updated_at'] >= updated_since]
+
+    monkeypatch.setattr(api_config, 'fetch_ghost_posts', fetch_ghost_posts)
+    monkeypatch.setattr(api_config, 'fetch_ghost_page_index', lambda deadline=None: {})
+    return posts
+
+
+def test_unchanged_incremental_sync_keeps_snapshot(ghost):
+    store = api_config._sync_posts(full=True)
+    mtime = snapshot.file_mtime(snapshot.POSTS_SNAPSHOT)
+    fetched_at = api_config._store_fetched_at
+
+    assert api_config._sync_posts(full=False) is store
+    assert snapshot.file_mtime(snapshot.POSTS_SNAPSHOT) == mtime
+    assert api_config._store.version == store.version
+    assert api_config._store_fetched_at > fetched_at
+
+
+def test_checked_sync_reaches_other_workers(ghost, monkeypatch):
+    store = api_config._sync_posts(full=True)
+    api_config._sync_posts(full=False)
+    checked_at = api_config._store_fetched_at
+
+    # Another worker still holding the snapshot's own fetch time
+    monkeypatch.setattr(api_config, '_store_fetched_at', 0)
+    monkeypatch.setattr(api_config, '_checked_mtime', None)
+    assert api_config.sync_from_snapshot() is False
+    assert api_config._store is store
+    assert api_config._store_fetched_at == checked_at
+
+
+def test_incremental_sync_merges_edits(ghost):
+    store = api_config._sync_posts(full=True)
+    ghost[0].update(title='Post 1, edited', updated_at='2024-02-01T00:00:00.000Z')
+
+    updated = api_config._sync_posts(full=False)
+    assert updated.version != store.version
+    assert updated.get('post-1').title == 'Post 1, edited'
+    assert len(updated.posts) == len(POSTS)
@@ -0,0 +1,102 @@
+"""Full-text post search, in the index and through /api/search."""
+import time
+
+import pytest
+
+import api_config
+from page_cache import page_cache
+from post_store import PostStore
+
+
+def ghost_post(i, title, excerpt='', html='', tags=()):
+    return {'id': f'{i:024x}', 'slug': f'post-{i}', 'title': title, 'excerpt': excerpt, 'html': html,
+            'published_at': f'2024-01-{i:02d}T00:00:00.000Z', 'updated_at': f'2024-01-{i:02d}T00:00:00.000Z',
+            'tags': [{'slug': tag, 'name': tag.replace('-', ' ')} for tag in tags]}
+
+
+POSTS = [
+    ghost_post(1, 'Design systems at scale', excerpt='Tokens and components', tags=('case-studies',)),
+    ghost_post(2, 'Running a remote workshop', html='<p>We talked about design for an hour.</p>'),
+    ghost_post(3, 'Notes from a designer', excerpt='What I learned', tags=('news',)),
+    ghost_post(4, 'Journey mapping', html='<p>Mapping the customer journey with design systems.</p>',
+               tags=('news',)),
+]
+
+
+@pytest.fixture
+def store():
+    return PostStore(POSTS, version='search-test')
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    """The app with store loaded, and no refresher talking to Ghost"""
+    import server
+
+    monkeypatch.setattr(api_config, 'start_refresher', lambda: None)
+    monkeypatch.setattr(api_config, '_store', store)
+    monkeypatch.setattr(api_config, '_store_fetched_at', time.time())
+    page_cache.clear()
+    return server.app.test_client()
+
+
+def slugs(results):
+    return [summary.slug for summary, _ in results]
+
+
+def test_title_matches_rank_above_body_matches(store):
+    assert slugs(store.search('systems')) == ['post-1', 'post-4']
+
+
+def test_equal_scores_go_to_the_newest_post(store):
+    # Both only mention "design" once in their body
+    results = slugs(store.search('design'))
+    assert results.index('post-4') < results.index('post-2')
+
+
+def test_every_term_must_match(store):
+    assert slugs(store.search('design systems')) == ['post-1', 'post-4']
+    assert store.search('design nonexistent') == []
+    assert store.search('the and of') == []
+
+
+def test_last_term_matches_as_a_prefix(store):
+    assert slugs(store.search('worksh')) == ['post-2']
+    assert slugs(store.search('remote worksh')) == ['post-2']
+    assert slugs(store.search('designe')) == ['post-3']
+    # Only the last term is a prefix
+    assert store.search('worksh remote') == []
+
+
+def test_whole_words_rank_above_prefix_matches():
+    # The whole word is on the older post, so this isn't the newest-first tie-break
+    store = PostStore([ghost_post(1, 'Plan'), ghost_post(2, 'Planning')])
+
+    assert slugs(store.search('plan')) == ['post-1', 'post-2']
+
+
+def test_tag_filter(store):
+    assert slugs(store.search('design', tag='news')) == ['post-3', 'post-4']
+    assert slugs(store.search('design', tag='case-studies')) == ['post-1']
+    assert store.search('design', tag='missing') == []
+
+
+def test_limit(store):
+    assert len(store.search('design', limit=2)) == 2
+    assert len(store.search('design', limit=10)) == 4
+
+
+def test_search_endpoint(client):
+    data = client.get('/api/search?q=design&tag=case-studies').get_json()
+
+    assert data['query'] == 'design'
+    assert [result['slug'] for result in data['results']] == ['post-1']
+    assert data['results'][0]['score'] > 0
+    assert client.get('/api/search?q=').get_json()['results'] == []
+
+
+@pytest.mark.parametrize('limit, expected', [('2', 2), ('0', 4), ('-1', 1), ('abc', 4), ('1000', 4)])
+def test_search_endpoint_limit(client, limit, expected):
+    data = client.get(f'/api/search?q=design&limit={limit}').get_json()
+
+    assert len(data['results']) == expected
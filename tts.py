@@ -0,0 +1,202 @@
+"""ElevenLabs speech for chat answers, streamed as it is synthesized.
+
+/api/chat returns the answer text straight away with an audio URL. The
+first request for that URL opens ElevenLabs' streaming endpoint and
+relays each chunk to the browser while writing it to the TTS cache, so
+playback starts on the first chunk and later requests are plain file
+hits. Concurrent syntheses per worker are capped so slow upstream
+streams can't occupy every thread.
+
+Only one request at a time, across all workers, synthesizes a given
+key: it holds a flock on <key>.mp3.lock and writes the audio to
+<key>.mp3.part as it arrives. Anyone else asking for that audio in the
+meantime follows the partial file instead of calling ElevenLabs again.
+"""
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: every request synthesizes for itself
+    fcntl = None
+
+import upstream
+from tts_cache import tts_cache, tts_cache_key
+
+logger = logging.getLogger(__name__)
+
+ELEVEN_LABS_API_URL = os.getenv('ELEVEN_LABS_API_URL', 'https://api.elevenlabs.io')
+ELEVEN_LABS_VOICE_ID = os.getenv('ELEVEN_LABS_VOICE_ID')
+ELEVEN_LABS_MODEL_ID = "eleven_monolingual_v1"
+ELEVEN_LABS_VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.5
+}
+
+TTS_TIMEOUT = (3.05, 15)  # Connect, and longest gap between audio chunks
+TTS_MAX_STREAMS = int(os.getenv('TTS_MAX_STREAMS', 4))
+SLOT_TIMEOUT = 5  # Seconds to wait for a free stream before answering 503
+CHUNK_SIZE = 4096
+FOLLOW_POLL = 0.05  # How often a follower checks the partial file for more audio
+FOLLOW_TIMEOUT = TTS_TIMEOUT[1] + SLOT_TIMEOUT  # Longest a follower waits without new audio
+
+_slots = threading.BoundedSemaphore(TTS_MAX_STREAMS)
+
+
+def audio_key(text):
+    return tts_cache_key(text, ELEVEN_LABS_VOICE_ID, ELEVEN_LABS_MODEL_ID, ELEVEN_LABS_VOICE_SETTINGS)
+
+
+def prepare_speech(text):
+    """Cache key for text's audio; queues the text for synthesis unless it is already cached"""
+    key = audio_key(text)
+    if tts_cache.get(key) is None:
+        tts_cache.add_pending(key, text)
+    return key
+
+
+def _lock_path(key):
+    return f'{tts_cache.path(key)}.lock'
+
+
+def partial_path(key):
+    return f'{tts_cache.path(key)}.part'
+
+
+class Synthesis:
+    """This request's claim on synthesizing one key; see claim_synthesis"""
+
+    def __init__(self, key, lock_file=None):
+        self.key = key
+        self._lock_file = lock_file
+
+    def release(self):
+        """Give up the claim, removing whatever partial audio wasn't stored"""
+        for path in (partial_path(self.key), _lock_path(self.key) if self._lock_file else None):
+            # Unlinked while still locked, so a later request starts a fresh lock file
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def claim_synthesis(key):
+    """A Synthesis if this request should synthesize key, or None if another request already is"""
+    os.makedirs(tts_cache.directory, exist_ok=True)
+    lock_file = None
+    while fcntl is not None:
+        lock_file = open(_lock_path(key), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        try:
+            if os.stat(_lock_path(key)).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                break
+        except OSError:
+            pass
+        # Locked a file the previous holder had already unlinked; start over on the current one
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+    # Created before the upstream call, so followers have something to open
+    open(partial_path(key), 'wb').close()
+    return Synthesis(key, lock_file)
+
+
+def is_synthesizing(key):
+    """Whether some request, in any worker, holds the claim on key"""
+    if fcntl is None:
+        return False
+    try:
+        lock_file = open(_lock_path(key), 'r')
+    except OSError:
+        return False
+    with lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+
+def follow_speech(key):
+    """Yield the audio another request is synthesizing for key, as it is written"""
+    deadline = time.monotonic() + FOLLOW_TIMEOUT
+    try:
+        # An open handle keeps reading the same file after it is renamed into the cache
+        f = open(partial_path(key), 'rb')
+    except OSError:
+        # Finished (or failed) between the claim and here
+        try:
+            f = open(tts_cache.path(key), 'rb')
+        except OSError:
+            return
+    with f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if chunk:
+                deadline = time.monotonic() + FOLLOW_TIMEOUT
+                yield chunk
+                continue
+            if not is_synthesizing(key):
+                rest = f.read()
+                if rest:
+                    yield rest
+                return
+            if time.monotonic() >= deadline:
+                logger.warning(f"❌ Gave up following TTS stream {key}")
+                return
+            time.sleep(FOLLOW_POLL)
+
+
+def open_speech_stream(text):
+    """Start streaming synthesis of text; None when every stream slot stays busy.
+
+    The caller must pass the result to close_speech_stream.
+    """
+    if not _slots.acquire(timeout=SLOT_TIMEOUT):
+        logger.warning("❌ All TTS streams busy")
+        return None
+    try:
+        stream = upstream.post(
+            f"{ELEVEN_LABS_API_URL}/v1/text-to-speech/{ELEVEN_LABS_VOICE_ID}/stream",
+            headers={
+                "Accept": "audio/mpeg",
+                "Content-Type": "application/json",
+                "xi-api-key": os.getenv('ELEVEN_LABS_API_KEY')
+            },
+            json={
+                "text": text,
+                "model_id": ELEVEN_LABS_MODEL_ID,
+                "voice_settings": ELEVEN_LABS_VOICE_SETTINGS
+            },
+            stream=True,
+            timeout=TTS_TIMEOUT,
+            service='elevenlabs'
+        )
+        stream.raise_for_status()
+    except Exception:
+        _slots.release()
+        raise
+    return stream
+
+
+def close_speech_stream(stream, synthesis=None):
+    stream.close()
+    _slots.release()
+    if synthesis is not None:
+        synthesis.release()
+
+
+def stream_speech(key, stream):
+    """Relay upstream audio chunks, caching the complete file under key"""
+    return tts_cache.write_through(key, stream.iter_content(chunk_size=CHUNK_SIZE), tmp_path=partial_path(key))
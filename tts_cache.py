@@ -0,0 +1,60 @@
+"""Content-addressed cache for synthesized speech.
+
+Audio is stored under a hash of everything that determines it (text,
+voice, model and voice settings), so a repeated answer is served from
+disk without another ElevenLabs call. The cache's SQLite index also
+holds the text of answers whose audio hasn't been synthesized yet, so
+whichever worker gets the audio request can stream it.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+
+from disk_cache import DiskCache
+from snapshot import CACHE_DIR
+
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(CACHE_DIR, 'tts'))
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+PENDING_TTL = 3600  # Text nobody asked to hear within an hour is dropped
+
+
+def tts_cache_key(text, voice_id, model_id, voice_settings):
+    """Hash of every input that changes the synthesized audio"""
+    payload = json.dumps({
+        'text': text,
+        'voice_id': voice_id,
+        'model_id': model_id,
+        'voice_settings': voice_settings
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache(DiskCache):
+    """Byte-capped LRU of audio files, plus text waiting to be synthesized"""
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        super().__init__(directory, max_bytes, extension='.mp3')
+
+    def _create_tables(self, db):
+        db.execute('CREATE TABLE IF NOT EXISTS pending (key TEXT PRIMARY KEY, text TEXT, created REAL)')
+
+    def _stored(self, db, key):
+        db.execute('DELETE FROM pending WHERE key = ?', (key,))
+
+    def add_pending(self, key, text):
+        """Remember text to synthesize when its audio is first requested"""
+        db = self._db()
+        db.execute('DELETE FROM pending WHERE created < ?', (time.time() - PENDING_TTL,))
+        db.execute('INSERT OR REPLACE INTO pending (key, text, created) VALUES (?, ?, ?)',
+                   (key, text, time.time()))
+
+    def pending_text(self, key):
+        row = self._db().execute('SELECT text FROM pending WHERE key = ? AND created >= ?',
+                                 (key, time.time() - PENDING_TTL)).fetchone()
+        return row[0] if row else None
+
+
+tts_cache = TTSCache()
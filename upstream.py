@@ -0,0 +1,157 @@
+"""One HTTP client layer for every outbound call (Ghost, GitHub, ElevenLabs).
+
+All calls share a pooled keep-alive session, so repeat requests to the
+same host skip the TCP and TLS handshake. Each call gets a timeout and
+an optional absolute deadline; retries of idempotent requests are done
+here rather than in urllib3 so that backoff never runs past the
+deadline. fan_out() runs independent fetches concurrently and gives up
+on whatever misses its deadline, so one slow dependency degrades a
+section of a page instead of blocking the response.
+
+Every attempt is counted per service in metrics, and the time a request
+spends here shows up as the "upstream" phase of its Server-Timing header.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import record_upstream, timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (3.05, 10)  # Connect, read
+POOL_SIZE = 20  # Keep-alive connections per host
+RETRIES = 2
+RETRY_BACKOFF = 0.25  # Doubles per attempt, capped by the deadline
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+FAN_OUT_WORKERS = 8
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The call's deadline passed before it could start or retry"""
+
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=POOL_SIZE)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def deadline_in(seconds):
+    """Absolute deadline for request(deadline=...) and fan_out()"""
+    return time.monotonic() + seconds
+
+
+def _timeout_for(timeout, deadline):
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline passed before the request was sent")
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return (min(connect, remaining), min(read, remaining))
+
+
+def _send(service, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, **kwargs)
+    except requests.exceptions.RequestException:
+        record_upstream(service, time.perf_counter() - start, 'error')
+        raise
+    record_upstream(service, time.perf_counter() - start, 'http_error' if response.status_code >= 400 else 'ok')
+    return response
+
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, deadline=None, retries=RETRIES, service='other', **kwargs):
+    """session.request with a timeout, an optional monotonic deadline and bounded retries.
+
+    Only idempotent methods are retried, on connection errors and
+    RETRY_STATUSES; the last response is returned either way so callers
+    keep their own raise_for_status() handling. service labels the
+    call's metrics.
+    """
+    with timed('upstream'):
+        return _request(method, url, timeout, deadline, retries, service, **kwargs)
+
+
+def _request(method, url, timeout, deadline, retries, service, **kwargs):
+    method = method.upper()
+    if method not in IDEMPOTENT_METHODS:
+        retries = 0
+    for attempt in range(retries + 1):
+        try:
+            response = _send(service, method, url, timeout=_timeout_for(timeout, deadline), **kwargs)
+        except requests.exceptions.ConnectionError:
+            if attempt == retries:
+                raise
+            response = None
+        if response is not None and (response.status_code not in RETRY_STATUSES or attempt == retries):
+            return response
+
+        backoff = RETRY_BACKOFF * (2 ** attempt)
+        if deadline is not None and time.monotonic() + backoff >= deadline:
+            if response is not None:
+                return response
+            raise DeadlineExceeded(f"No time left to retry {method} {url}")
+        if response is not None:
+            response.close()
+        logger.debug(f"🔄 Retrying {method} {url} in {backoff:.2f}s")
+        time.sleep(backoff)
+
+
+def close_connections():
+    """Drop pooled connections, e.g. before forking so workers never share a socket"""
+    session.close()
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def _fan_out_executor():
+    global _executor, _executor_pid
+    # Threads don't survive a fork, so each worker process gets its own pool
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix='upstream')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def fan_out(calls, timeout):
+    """Run {name: fn} concurrently; returns ({name: result}, names that failed or missed the deadline)"""
+    executor = _fan_out_executor()
+    futures = {name: executor.submit(fn) for name, fn in calls.items()}
+    # The calls run on pool threads, so the request sees them as one wait
+    with timed('fan_out'):
+        wait(futures.values(), timeout=timeout)
+
+    results = {}
+    degraded = set()
+    for name, future in futures.items():
+        if not future.done():
+            logger.warning(f"❌ {name} missed its {timeout}s deadline")
+            degraded.add(name)
+            results[name] = None
+        elif future.exception() is not None:
+            logger.error(f"❌ {name} failed: {str(future.exception())}")
+            degraded.add(name)
+            results[name] = None
+        else:
+            results[name] = future.result()
+    return results, degraded
@@ -0,0 +1,204 @@
+"""Pre-render the site into a directory a static file server can serve.
+
+    python utils/export_site.py [output_dir] [--base-url URL] [--full] [--refresh]
+
+Renders through the Flask app's own routes and templates: the home
+page, /blog, every /blog/<slug> and /case-studies/<slug>, every Ghost
+page and the /api/posts/<slug> and /api/case-studies/<slug> JSON, plus
+the X-Fragment variant of each HTML page. Then it copies static/ and
+writes brotli/gzip siblings of everything.
+
+Layout: HTML at <path>/index.html (fragments at <path>/index.fragment.html)
+and JSON at <path>.json, so a server needs try_files along the lines of
+"$uri $uri/index.html $uri.json @app", plus sending requests with an
+X-Fragment header to index.fragment.html. Search, pagination, chat,
+audio and /img stay dynamic.
+
+Rebuilds are incremental: export-manifest.json records what each page
+was rendered from, and a post's pages are only re-rendered when its
+updated_at (or a neighbour's, where prev/next links are shown) changes.
+Listing pages are re-rendered every run but only rewritten when their
+bytes change. Any template, code or asset manifest change re-renders
+everything, and pages whose source disappeared are deleted.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from precompress import precompress_file  # noqa: E402
+from api_config import get_page_index, get_post_store  # noqa: E402
+from compression import EXTENSIONS  # noqa: E402
+from github_contributions import get_github_contributions  # noqa: E402
+from server import app  # noqa: E402
+
+MANIFEST_NAME = 'export-manifest.json'
+DEFAULT_OUTPUT = os.path.join(ROOT, 'export')
+DEFAULT_BASE_URL = os.getenv('SITE_URL', 'https://portfolio-site-dry-bush-8746.fly.dev')
+CONTRIBUTIONS_WAIT = 15  # Seconds to wait for a cold GitHub calendar before rendering without it
+TEMPLATE_PAGES = ('/blog', '/about', '/contact')  # Rendered every run; cheap and few
+
+
+def build_key():
+    """Changes whenever templates, code or asset manifests change, forcing a full re-render"""
+    digest = hashlib.sha256()
+    inputs = sorted(Path(ROOT, 'templates').rglob('*')) + sorted(Path(ROOT).glob('*.py'))
+    inputs += [Path(ROOT, 'static', 'dist', 'manifest.json'), Path(ROOT, 'static', 'images', 'responsive', 'manifest.json')]
+    for path in inputs:
+        if path.is_file():
+            digest.update(str(path.relative_to(ROOT)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _stamp(post):
+    return [post.slug, post.updated_at] if post else None
+
+
+def page_sources(store, pages):
+    """{url: what it renders from}; None means re-render every run"""
+    sources = {'/': None}
+    sources.update({url: None for url in TEMPLATE_PAGES})
+    for post in store.posts:
+        sources[f'/blog/{post.slug}'] = [_stamp(post)]
+        sources[f'/api/posts/{post.slug}'] = [_stamp(post), _stamp(store.prev(post.slug)), _stamp(store.next(post.slug))]
+    for post in store.tagged('case-studies'):
+        links = [_stamp(post), _stamp(store.prev(post.slug, tag='case-studies')),
+                 _stamp(store.next(post.slug, tag='case-studies'))]
+        sources[f'/case-studies/{post.slug}'] = links
+        sources[f'/api/case-studies/{post.slug}'] = links
+    for slug, updated_at in pages.items():
+        sources[f'/{slug}'] = [[slug, updated_at]]
+    return sources
+
+
+def is_json_url(url):
+    return url.startswith('/api/')
+
+
+def output_files(url):
+    """{relative file: request headers} the url is exported as"""
+    if is_json_url(url):
+        return {f'{url.strip("/")}.json': {}}
+    directory = url.strip('/')
+    index = f'{directory}/index' if directory else 'index'
+    return {f'{index}.html': {}, f'{index}.fragment.html': {'X-Fragment': '1'}}
+
+
+def write_if_changed(path, body):
+    """Write body unless the file already holds it; returns whether it was written"""
+    if path.exists() and path.stat().st_size == len(body) and path.read_bytes() == body:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(body)
+    os.replace(tmp_path, path)
+    return True
+
+
+def remove_output(path):
+    for candidate in [path] + [Path(str(path) + extension) for extension in EXTENSIONS.values()]:
+        candidate.unlink(missing_ok=True)
+
+
+def copy_static(output_dir):
+    """Mirror static/ (assets plus their precompressed siblings), copying only changed files"""
+    source_root = Path(app.static_folder)
+    destination_root = output_dir / 'static'
+    copied = 0
+    for source in source_root.rglob('*'):
+        if not source.is_file():
+            continue
+        destination = destination_root / source.relative_to(source_root)
+        if destination.exists() and destination.stat().st_mtime >= source.stat().st_mtime:
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, destination)
+        copied += 1
+    return copied
+
+
+def load_manifest(output_dir):
+    try:
+        with open(output_dir / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_site(output_dir=DEFAULT_OUTPUT, base_url=DEFAULT_BASE_URL, full=False, refresh=False):
+    output_dir = Path(output_dir)
+    started = time.monotonic()
+    store = get_post_store(force_refresh=refresh)
+    if not store.posts:
+        print("❌ No posts available; check GHOST_URL and GHOST_CONTENT_API_KEY")
+        return False
+    if get_github_contributions(timeout=CONTRIBUTIONS_WAIT) is None:
+        print("❌ GitHub contributions unavailable; the home page will render without them")
+
+    manifest = load_manifest(output_dir)
+    build = build_key()
+    previous = manifest.get('pages', {}) if manifest.get('build') == build and not full else {}
+    sources = page_sources(store, get_page_index())
+
+    client = app.test_client()
+    pages = {}
+    rendered = written = skipped = failed = 0
+    for url, source in sources.items():
+        files = output_files(url)
+        entry = previous.get(url)
+        if (source is not None and entry is not None and entry['source'] == source
+                and all((output_dir / name).exists() for name in files)):
+            pages[url] = entry
+            skipped += 1
+            continue
+
+        responses = {name: client.get(url, base_url=base_url, headers=headers) for name, headers in files.items()}
+        if any(response.status_code != 200 for response in responses.values()):
+            status = ', '.join(str(response.status_code) for response in responses.values())
+            if url not in TEMPLATE_PAGES:
+                print(f"❌ {url} answered {status}; keeping the previous export, if any")
+                failed += 1
+                if url in manifest.get('pages', {}):
+                    pages[url] = manifest['pages'][url]
+            continue
+        rendered += 1
+        for name, response in responses.items():
+            path = output_dir / name
+            if write_if_changed(path, response.get_data()):
+                written += 1
+            precompress_file(path)
+        pages[url] = {'source': source, 'files': list(files)}
+
+    # Posts and pages that were deleted or unpublished since the last export
+    for url, entry in manifest.get('pages', {}).items():
+        if url not in pages:
+            for name in entry['files']:
+                remove_output(output_dir / name)
+            print(f"🔄 Removed {url}")
+
+    copied = copy_static(output_dir)
+    with open(output_dir / MANIFEST_NAME, 'w') as f:
+        json.dump({'build': build, 'version': store.version, 'pages': pages}, f, indent=2, sort_keys=True)
+
+    print(f"✅ Exported {len(pages)} pages to {output_dir} in {time.monotonic() - started:.1f}s: "
+          f"{rendered} rendered, {skipped} unchanged, {written} files written, "
+          f"{copied} static files copied, {failed} failed")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output_dir', nargs='?', default=DEFAULT_OUTPUT)
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help="Origin absolute URLs are built with")
+    parser.add_argument('--full', action='store_true', help="Re-render every page, ignoring the manifest")
+    parser.add_argument('--refresh', action='store_true', help="Full sync from Ghost instead of the cached snapshot")
+    args = parser.parse_args()
+    sys.exit(0 if export_site(args.output_dir, args.base_url, full=args.full, refresh=args.refresh) else 1)
@@ -0,0 +1,43 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import DIST_DIR, FINGERPRINT_DIRS, HASH_LENGTH, MANIFEST_NAME  # noqa: E402
+
+
+def fingerprint_static(static_dir='static'):
+    """Copy static assets to static/dist/ under content-hashed names and write the manifest"""
+    static_dir = Path(static_dir)
+    dist_dir = static_dir / DIST_DIR
+
+    # Rebuild from scratch so removed or changed files don't leave stale copies
+    if dist_dir.exists():
+        shutil.rmtree(dist_dir)
+
+    manifest = {}
+    for folder in FINGERPRINT_DIRS:
+        for source_path in sorted((static_dir / folder).rglob('*')):
+            if not source_path.is_file() or source_path.suffix in ('.br', '.gz'):
+                continue
+            digest = hashlib.sha256(source_path.read_bytes()).hexdigest()[:HASH_LENGTH]
+            relative = source_path.relative_to(static_dir)
+            hashed = relative.with_name(f"{source_path.stem}.{digest}{source_path.suffix}")
+            destination = dist_dir / hashed
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source_path, destination)
+            manifest[relative.as_posix()] = (Path(DIST_DIR) / hashed).as_posix()
+
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    with open(dist_dir / MANIFEST_NAME, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Fingerprinted {len(manifest)} assets into {dist_dir}")
+    return manifest
+
+
+if __name__ == "__main__":
+    fingerprint_static(sys.argv[1] if len(sys.argv) > 1 else 'static')
@@ -1,34 +1,116 @@
-from PIL import Image
+import hashlib
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def convert_to_webp(source_path, quality=80):
-    """Convert images to WebP format with optimization"""
-    destination = source_path.with_suffix('.webp')
-    
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from responsive_images import (  # noqa: E402
+    FORMATS, MANIFEST_NAME, QUALITY, RESPONSIVE_DIR, SKIP_PREFIXES, SOURCE_DIR, SOURCE_EXTENSIONS, WIDTHS,
+    register_avif
+)
+
+register_avif()
+
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'method': 6},
+    'avif': {'format': 'AVIF', 'speed': 6},
+}
+
+
+def settings_key():
+    """Changes whenever a setting that affects the output changes, forcing a rebuild"""
+    return json.dumps([WIDTHS, FORMATS, QUALITY], sort_keys=True)
+
+
+def target_widths(source_width):
+    """Every configured width smaller than the source, plus the source width itself"""
+    return [w for w in WIDTHS if w < source_width] + [source_width]
+
+
+def build_variants(source_path, static_dir):
+    """Resize one source to every width and format; returns its manifest entry"""
+    static_dir = Path(static_dir)
     image = Image.open(source_path)
-    
-    # Convert RGBA to RGB if necessary
-    if image.mode in ('RGBA', 'LA'):
-        background = Image.new('RGB', image.size, (255, 255, 255))
-        background.paste(image, mask=image.split()[-1])
-        image = background
-    
-    image.save(str(destination), 'WEBP', quality=quality)
-    return destination
-
-def optimize_images():
-    """Batch convert all images in static/images to WebP"""
-    static_dir = Path('static/images')
-    
-    # Create directories if they don't exist
-    static_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Process all images
-    for image_path in static_dir.glob('*'):
-        if image_path.suffix.lower() in ('.png', '.jpg', '.jpeg'):
-            print(f"Converting {image_path.name} to WebP...")
-            convert_to_webp(image_path)
+    image.load()
+    # Keep transparency where the source has it; only drop palette/CMYK oddities
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    entry = {'width': image.width, 'height': image.height, 'variants': {}}
+    for fmt in FORMATS:
+        variants = []
+        for width in target_widths(image.width):
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            relative = Path(RESPONSIVE_DIR) / f"{source_path.stem}-{width}.{fmt}"
+            resized.save(static_dir / relative, quality=QUALITY[fmt], **SAVE_OPTIONS[fmt])
+            variants.append({'width': width, 'path': relative.as_posix()})
+        entry['variants'][fmt] = variants
+    return entry
+
+
+def _build(job):
+    source_path, static_dir, digest = job
+    entry = build_variants(Path(source_path), static_dir)
+    entry['hash'] = digest
+    entry['settings'] = settings_key()
+    return entry
+
+
+def _outputs_exist(entry, static_dir):
+    return all((Path(static_dir) / v['path']).exists()
+               for variants in entry['variants'].values() for v in variants)
+
+
+def optimize_images(static_dir='static', workers=None):
+    """Build responsive variants for changed images in static/images across all cores"""
+    static_dir = Path(static_dir)
+    output_dir = static_dir / RESPONSIVE_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_file.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    sources = {}
+    jobs = []
+    for source_path in sorted((static_dir / SOURCE_DIR).glob('*')):
+        if source_path.suffix.lower() not in SOURCE_EXTENSIONS or source_path.name.startswith(SKIP_PREFIXES):
+            continue
+        name = source_path.relative_to(static_dir).as_posix()
+        digest = hashlib.sha256(source_path.read_bytes()).hexdigest()
+        sources[name] = source_path
+        previous = manifest.get(name)
+        if (previous and previous.get('hash') == digest and previous.get('settings') == settings_key()
+                and _outputs_exist(previous, static_dir)):
+            continue
+        jobs.append((name, (str(source_path), str(static_dir), digest)))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (name, _), entry in zip(jobs, pool.map(_build, [job for _, job in jobs])):
+                manifest[name] = entry
+                print(f"Built {len(entry['variants'])} formats of {name} "
+                      f"at {[v['width'] for v in next(iter(entry['variants'].values()))]}px")
+
+    # Drop variants of sources that were deleted or whose widths changed
+    manifest = {name: entry for name, entry in manifest.items() if name in sources}
+    keep = {v['path'] for entry in manifest.values() for variants in entry['variants'].values() for v in variants}
+    for path in output_dir.iterdir():
+        relative = path.relative_to(static_dir).as_posix()
+        if path.name != MANIFEST_NAME and relative not in keep:
+            path.unlink()
+
+    manifest_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    print(f"{len(jobs)} of {len(sources)} images rebuilt; manifest at {manifest_file}")
+    return manifest
+
 
 if __name__ == "__main__":
-    optimize_images() 
\ No newline at end of file
+    optimize_images(sys.argv[1] if len(sys.argv) > 1 else 'static')
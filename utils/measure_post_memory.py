@@ -0,0 +1,99 @@
+"""Compare per-worker memory held by raw Ghost post dicts vs. the PostStore, and size the search index.
+
+Uses the posts snapshot in CACHE_DIR if there is one, otherwise a synthetic
+archive. Run from the repo root:
+
+    python utils/measure_post_memory.py [--posts 200] [--html-kb 20]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from post_store import PostStore  # noqa: E402
+from search_index import SEARCH_MEMORY_BUDGET, SearchIndex  # noqa: E402
+from snapshot import read_posts_snapshot  # noqa: E402
+
+WORDS = ('design', 'research', 'journey', 'product', 'system', 'workshop', 'prototype', 'customer',
+         'experiment', 'vision', 'metric', 'flow', 'team', 'audit', 'insight', 'roadmap')
+
+
+def synthetic_posts(count, html_kb):
+    """Ghost-shaped posts with realistic field counts and HTML sizes"""
+    rng = random.Random(42)
+    posts = []
+    for i in range(count):
+        paragraphs = []
+        while sum(len(p) for p in paragraphs) < html_kb * 1024:
+            paragraphs.append('<p>' + ' '.join(rng.choice(WORDS) for _ in range(80)) + '</p>')
+        posts.append({
+            'id': f'{i:024x}', 'uuid': f'uuid-{i}', 'slug': f'post-{i}', 'title': f'Post {i}',
+            'html': ''.join(paragraphs), 'comment_id': str(i), 'feature_image': f'https://example.ghost.io/content/images/size/w1000/{i}.jpg',
+            'featured': False, 'visibility': 'public', 'created_at': '2024-01-01T00:00:00.000+00:00',
+            'updated_at': '2024-01-02T00:00:00.000+00:00', 'published_at': '2024-01-02T00:00:00.000+00:00',
+            'custom_excerpt': None, 'codeinjection_head': None, 'codeinjection_foot': None,
+            'custom_template': None, 'canonical_url': None, 'url': f'https://example.ghost.io/post-{i}/',
+            'excerpt': ' '.join(rng.choice(WORDS) for _ in range(40)), 'reading_time': 4,
+            'access': True, 'comments': False, 'og_image': None, 'og_title': None, 'og_description': None,
+            'twitter_image': None, 'twitter_title': None, 'twitter_description': None,
+            'meta_title': None, 'meta_description': None, 'email_subject': None, 'frontmatter': None,
+            'feature_image_alt': None, 'feature_image_caption': None,
+            'tags': [{'id': f't{i % 4}', 'name': 'Tag', 'slug': ('news', 'playbook', 'tech-stack', 'case-studies')[i % 4],
+                      'description': None, 'feature_image': None, 'visibility': 'public',
+                      'url': 'https://example.ghost.io/tag/x/'}],
+            'authors': [{'id': 'a1', 'name': 'Author', 'slug': 'author', 'profile_image': None, 'cover_image': None,
+                         'bio': None, 'website': None, 'location': None, 'facebook': None, 'twitter': None,
+                         'url': 'https://example.ghost.io/author/author/'}],
+        })
+    return posts
+
+
+def measure(build):
+    """Bytes still allocated after build() returns, keeping its result alive"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--html-kb', type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot = read_posts_snapshot()
+    if snapshot:
+        source = f"snapshot {snapshot['version']}"
+        payload = json.dumps(snapshot['posts'])
+    else:
+        source = f"synthetic archive ({args.posts} posts, ~{args.html_kb} KB HTML each)"
+        payload = json.dumps(synthetic_posts(args.posts, args.html_kb))
+    del snapshot
+
+    raw_bytes, raw = measure(lambda: json.loads(payload))
+    count = len(raw)
+    del raw
+    store_bytes, store = measure(lambda: PostStore(json.loads(payload)))
+    posts = json.loads(payload)
+    index_bytes, index = measure(lambda: SearchIndex.build(posts))
+
+    print(f"Source:        {source}")
+    print(f"Posts:         {count}")
+    print(f"Raw dicts:     {raw_bytes / 1024:,.0f} KiB")
+    print(f"PostStore:     {store_bytes / 1024:,.0f} KiB")
+    print(f"Saved/worker:  {(raw_bytes - store_bytes) / 1024:,.0f} KiB ({1 - store_bytes / max(raw_bytes, 1):.0%})")
+    print(f"Search index:  {index_bytes / 1024:,.0f} KiB of {SEARCH_MEMORY_BUDGET / 1024:,.0f} KiB budget "
+          f"({len(index.postings):,} terms; included in PostStore)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import mimetypes
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression import BROTLI_QUALITY, ENCODINGS, EXTENSIONS, MIN_SIZE, compress, is_compressible  # noqa: E402
+
+
+def precompress_file(source_path):
+    """Write .br/.gz siblings for one file; skips variants that are up to date or don't help"""
+    written = []
+    body = None
+    for encoding in ENCODINGS:
+        destination = Path(str(source_path) + EXTENSIONS[encoding])
+        if destination.exists() and destination.stat().st_mtime >= source_path.stat().st_mtime:
+            continue
+        if body is None:
+            body = source_path.read_bytes()
+        compressed = compress(body, encoding, BROTLI_QUALITY)
+        if len(compressed) >= len(body):
+            # Serving the original is cheaper; drop any stale variant
+            destination.unlink(missing_ok=True)
+            continue
+        destination.write_bytes(compressed)
+        written.append(destination)
+    return written
+
+
+def precompress_static(static_dir='static'):
+    """Precompress every compressible file under static/ at build time"""
+    for source_path in sorted(Path(static_dir).rglob('*')):
+        if not source_path.is_file() or source_path.suffix in ('.br', '.gz'):
+            continue
+        if source_path.stat().st_size < MIN_SIZE:
+            continue
+        if not is_compressible(mimetypes.guess_type(source_path.name)[0]):
+            continue
+        for destination in precompress_file(source_path):
+            print(f"Compressed {source_path} -> {destination.name} "
+                  f"({source_path.stat().st_size:,} -> {destination.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    precompress_static(sys.argv[1] if len(sys.argv) > 1 else 'static')
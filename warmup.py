@@ -0,0 +1,60 @@
+"""Boot-time warm-up for gunicorn's master process (see gunicorn.conf.py).
+
+With preload_app the app is imported once, in the master. warm_up() then
+loads the posts (search index included), the GitHub calendar and the
+compiled templates there, before the listening socket is opened. Workers
+fork with all of it already in memory, shared copy-on-write, and the
+first visitor after a Fly auto-start never waits on Ghost or GitHub.
+
+Snapshots on disk are used however stale; upstream is only called when
+there is none, and never for longer than WARM_UP_DEADLINE, so a hanging
+Ghost can't hold the port closed.
+"""
+import gc
+import logging
+import threading
+import time
+
+import upstream
+from api_config import preload_posts
+from github_contributions import preload_contributions
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_DEADLINE = 10  # Seconds of upstream calls allowed before gunicorn listens
+
+
+def _load(name, loader, loaded, deadline):
+    try:
+        loaded[name] = loader(deadline=deadline) is not None
+    except Exception as e:
+        logger.error(f"❌ Warm-up of {name} failed: {str(e)}")
+        loaded[name] = False
+
+
+def warm_up(app):
+    """Load content and templates into this process; returns {part: loaded?}"""
+    started = time.monotonic()
+    deadline = upstream.deadline_in(WARM_UP_DEADLINE)
+    loaded = {}
+    # Ghost and GitHub are independent, so fetch them side by side. Both are
+    # awaited in full (the shared deadline bounds them): forking mid-fetch would
+    # leave workers holding the refresh lock's file descriptor.
+    threads = [threading.Thread(target=_load, args=(name, loader, loaded, deadline), name=f'warm-up-{name}')
+               for name, loader in (('posts', preload_posts), ('github_contributions', preload_contributions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    loaded['templates'] = True
+
+    # Workers open their own keep-alive connections
+    upstream.close_connections()
+    # Keep the collector from touching, and so copying, everything loaded so far
+    gc.freeze()
+    logger.info(f"✅ Warmed up in {time.monotonic() - started:.2f}s: "
+                + ', '.join(f"{name} {'ok' if ok else 'missing'}" for name, ok in loaded.items()))
+    return loaded